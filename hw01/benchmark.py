@@ -0,0 +1,163 @@
+'''
+Throughput benchmark of the Game of Life engines in hw01.
+
+Every engine evolves every pattern on square boards of several sizes. The benchmark reports the
+cells updated per second, the peak memory traced by tracemalloc during a separate run and the
+percentiles of the latency per generation, and writes the results as JSON.
+HashLife keeps its memoized nodes between runs, as it would in a long-running process. HashLife
+evolves the unbounded plane, so its final board is cropped to the grid instead of failing when cells
+leave the grid (see HashLife.to_grid).
+
+Command line options (all optional):
+    --engines=list,numpy,...  the engines to benchmark (default: all engines).
+    --patterns=soup,gun,r-pentomino  the initial patterns (default: all patterns).
+    --sizes=64,256,1024  the sizes of boards (default: 64,256,1024).
+    --generations=N  the number of generations per run (default: 10).
+    --workers=N  the number of processes of the parallel engine.
+    --output=NAME  the JSON file to write (default: benchmark.json).
+'''
+
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+from hw01 import engine
+
+ENGINES = ('list', 'incremental', 'numpy', 'sparse', 'hashlife', 'parallel')
+
+GLIDER_GUN = (
+  (5, 1), (5, 2), (6, 1), (6, 2), (5, 11), (6, 11), (7, 11), (4, 12), (8, 12), (3, 13), (9, 13),
+  (3, 14), (9, 14), (6, 15), (4, 16), (8, 16), (5, 17), (6, 17), (7, 17), (6, 18), (3, 21), (4, 21),
+  (5, 21), (3, 22), (4, 22), (5, 22), (2, 23), (6, 23), (1, 25), (2, 25), (6, 25), (7, 25), (3, 35),
+  (4, 35), (3, 36), (4, 36),
+)
+
+R_PENTOMINO = ((0, 1), (0, 2), (1, 0), (1, 1), (2, 1))
+
+def soup(size, density=0.3, seed=0):
+  """ Return a board of random cells.
+    :param int size: the number of rows and columns.
+    :param float density: the probability that a cell is living.
+    :param int seed: the random seed, so that every engine evolves the same board.
+  """
+  generator = random.Random(seed)
+  return [[generator.random() < density for column in range(size)] for row in range(size)]
+
+def place(cells, size, centred=True):
+  """ Return a board containing a pattern.
+    :param tuple cells: the coordinates of living cells of the pattern.
+    :param int size: the number of rows and columns.
+    :param bool centred: whether the pattern is placed at the centre or at the top left corner.
+  """
+  offset = size // 2 if centred else 0
+  grid = [[False for column in range(size)] for row in range(size)]
+  for row_index, column_index in cells:
+    grid[row_index + offset][column_index + offset] = True
+  return grid
+
+PATTERNS = {
+  'soup': soup,
+  'gun': lambda size: place(GLIDER_GUN, size, centred=False),
+  'r-pentomino': lambda size: place(R_PENTOMINO, size),
+}
+
+def percentile(values, fraction):
+  """ Return a percentile by the nearest-rank method.
+    :param list values: sorted values.
+    :param float fraction: the percentile divided by 100.
+  """
+  return values[min(int(fraction * len(values)), len(values) - 1)]
+
+def run(name, grid, generations, workers=None):
+  """ Evolve a grid and return the latency of every generation in seconds.
+    :param str name: the name of engine.
+    :param list grid: the initial grid.
+    :param int generations: the number of generations.
+    :param int workers: the number of processes of the parallel engine.
+  """
+  load, step, dump = engine(name, workers)
+  state = load(grid)
+  latencies = []
+  try:
+    for g in range(generations):
+      start = time.perf_counter()
+      state = step(state)
+      latencies.append(time.perf_counter() - start)
+    # HashLife evolves the unbounded plane and fails to dump cells outside the grid unless cropping
+    dump(state, crop=True) if name == 'hashlife' else dump(state)
+  finally:
+    if hasattr(state, 'close'):
+      state.close()
+  return latencies
+
+def benchmark(name, pattern, size, generations, workers=None):
+  """ Benchmark an engine on a pattern and return the results as a dict.
+    :param str name: the name of engine.
+    :param str pattern: the name of pattern.
+    :param int size: the number of rows and columns.
+    :param int generations: the number of generations.
+    :param int workers: the number of processes of the parallel engine.
+  """
+  grid = PATTERNS[pattern](size)
+  latencies = sorted(run(name, grid, generations, workers))
+
+  # memory is traced in a separate run since tracing slows down the evolution
+  tracemalloc.start()
+  run(name, grid, generations, workers)
+  peak_memory = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+
+  total = sum(latencies)
+  return {
+    'engine': name,
+    'pattern': pattern,
+    'size': size,
+    'generations': generations,
+    'cells_per_second': size * size * generations / total if total else None,
+    'peak_memory_bytes': peak_memory,
+    'latency_seconds': {
+      'mean': total / generations,
+      'p50': percentile(latencies, 0.5),
+      'p90': percentile(latencies, 0.9),
+      'p99': percentile(latencies, 0.99),
+      'max': latencies[-1],
+    },
+  }
+
+def main():
+  """ Main program. """
+  import sys
+
+  options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+  names       = options['engines'].split(',') if 'engines' in options else ENGINES
+  patterns    = options['patterns'].split(',') if 'patterns' in options else tuple(PATTERNS)
+  sizes       = [int(size) for size in options.get('sizes', '64,256,1024').split(',')]
+  generations = int(options.get('generations', 10))
+  workers     = int(options['workers']) if 'workers' in options else None
+  output_name = options.get('output', 'benchmark.json')
+
+  results = []
+  for pattern in patterns:
+    for size in sizes:
+      for name in names:
+        result = benchmark(name, pattern, size, generations, workers)
+        results.append(result)
+        print(
+          '{:<12} {:<12} {:>6} {:>16.0f} cells/s {:>12} bytes p50 {:.6f} s p99 {:.6f} s'.format(
+            pattern, name, size, result['cells_per_second'] or 0, result['peak_memory_bytes'],
+            result['latency_seconds']['p50'], result['latency_seconds']['p99']
+          )
+        )
+
+  with open(output_name, 'w') as output_file:
+    json.dump({
+      'python': platform.python_version(),
+      'platform': platform.platform(),
+      'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+      'results': results,
+    }, output_file, indent=2)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,301 @@
+'''
+Sparse backends of Conway's Game of Life for huge, mostly empty universes.
+
+The sparse engine stores only the coordinates of living cells and evolves them within the
+bounds of the grid, so it produces exactly the same generations as hw01.evolve.
+
+The HashLife engine stores the universe in a quadtree whose nodes are shared and whose
+successors are memoized, so that a jump of 2^k generations costs roughly O(k) node
+operations on regular patterns. HashLife simulates the unbounded plane: its generations
+match hw01.evolve as long as every living cell stays inside the grid, and HashLife.to_grid raises
+ValueError as soon as a living cell is outside the grid.
+'''
+
+from collections import Counter
+
+from hw01 import NEIGHBOURS
+
+##################
+# SPARSE BACKEND #
+##################
+
+def load_sparse(grid):
+  """ Convert a grid to a sparse universe, i.e. a tuple (living cells, rows, columns).
+    :param list grid: the grid to convert.
+  """
+  cells = set(
+    (row_index, column_index)
+      for row_index, row in enumerate(grid)
+        for column_index, cell in enumerate(row) if cell
+  )
+  return cells, len(grid), len(grid[0])
+
+def dump_sparse(universe):
+  """ Convert a sparse universe to a grid.
+    :param tuple universe: the sparse universe to convert.
+  """
+  cells, rows, columns = universe
+  grid = [[False for column in range(columns)] for row in range(rows)]
+  for row_index, column_index in cells:
+    grid[row_index][column_index] = True
+  return grid
+
+def evolve_sparse(universe):
+  """ Evolve a sparse universe. Only living cells and their neighbours are examined.
+    :param tuple universe: the sparse universe to evolve.
+  """
+  cells, rows, columns = universe
+  life_count = Counter(
+    (row_index + row_offset, column_index + column_offset)
+      for row_index, column_index in cells
+        for row_offset, column_offset in NEIGHBOURS
+  )
+  resulted_cells = set(
+    (row_index, column_index)
+      for (row_index, column_index), count in life_count.items()
+        if (count == 3 or count == 2 and (row_index, column_index) in cells) and
+          0 <= row_index < rows and 0 <= column_index < columns
+  )
+  return resulted_cells, rows, columns
+
+####################
+# HASHLIFE BACKEND #
+####################
+
+class Node:
+  """ A node of the HashLife quadtree, i.e. a square of 2^level x 2^level cells.
+    Nodes are immutable and canonical: equal squares are represented by the same node,
+    so nodes can be compared and hashed by identity.
+  """
+  __slots__ = ('level', 'population', 'nw', 'ne', 'sw', 'se')
+
+  def __init__(self, level, population, nw=None, ne=None, sw=None, se=None):
+    self.level = level
+    self.population = population
+    self.nw, self.ne, self.sw, self.se = nw, ne, sw, se
+
+DEAD = Node(0, 0)
+ALIVE = Node(0, 1)
+
+_nodes = {}       # (nw, ne, sw, se) -> canonical node
+_empty = [DEAD]   # level -> empty node
+_successors = {}  # (node, j) -> successor of node after 2^j generations
+
+def join(nw, ne, sw, se):
+  """ Return the canonical node composed of 4 quadrants of the same level.
+    :param Node nw, ne, sw, se: the quadrants.
+  """
+  key = nw, ne, sw, se
+  node = _nodes.get(key)
+  if node is None:
+    population = nw.population + ne.population + sw.population + se.population
+    node = _nodes[key] = Node(nw.level + 1, population, nw, ne, sw, se)
+  return node
+
+def empty(level):
+  """ Return the empty node of a level.
+    :param int level: the level of node.
+  """
+  while len(_empty) <= level:
+    e = _empty[-1]
+    _empty.append(join(e, e, e, e))
+  return _empty[level]
+
+def centre(node):
+  """ Return the node of the next level whose centre is the given node.
+    :param Node node: the node to pad.
+  """
+  e = empty(node.level - 1)
+  return join(
+    join(e, e, e, node.nw), join(e, e, node.ne, e),
+    join(e, node.sw, e, e), join(node.se, e, e, e)
+  )
+
+def _inner(node):
+  """ Return the central node two levels below the given node. """
+  return join(node.nw.se.se, node.ne.sw.sw, node.sw.ne.ne, node.se.nw.nw)
+
+def _life_4x4(node):
+  """ Evolve the centre 2x2 cells of a level 2 node by one generation. """
+  cells = [
+    [node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+    [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+    [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+    [node.sw.sw, node.sw.se, node.se.sw, node.se.se],
+  ]
+  resulted_cells = []
+  for row_index in (1, 2):
+    for column_index in (1, 2):
+      life_count = sum(
+        cells[row_index + row_offset][column_index + column_offset].population
+          for row_offset, column_offset in NEIGHBOURS
+      )
+      alive = life_count == 3 or life_count == 2 and cells[row_index][column_index].population
+      resulted_cells.append(ALIVE if alive else DEAD)
+  return join(*resulted_cells)
+
+def successor(node, j):
+  """ Return the centre node one level below the given node, 2^j generations later.
+    :param Node node: a node of level 2 or higher.
+    :param int j: log2 of the number of generations. j must not exceed node.level - 2.
+  """
+  if node.population == 0:
+    return node.nw
+  key = node, j
+  result = _successors.get(key)
+  if result is not None:
+    return result
+
+  if node.level == 2:
+    result = _life_4x4(node)
+  else:
+    nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+    # 9 overlapping nodes of the level below, 2^j generations later (or 2^(level - 3) if fewer)
+    sub_j = min(j, node.level - 3)
+    c1 = successor(nw, sub_j)
+    c2 = successor(join(nw.ne, ne.nw, nw.se, ne.sw), sub_j)
+    c3 = successor(ne, sub_j)
+    c4 = successor(join(nw.sw, nw.se, sw.nw, sw.ne), sub_j)
+    c5 = successor(join(nw.se, ne.sw, sw.ne, se.nw), sub_j)
+    c6 = successor(join(ne.sw, ne.se, se.nw, se.ne), sub_j)
+    c7 = successor(sw, sub_j)
+    c8 = successor(join(sw.ne, se.nw, sw.se, se.sw), sub_j)
+    c9 = successor(se, sub_j)
+    if j < node.level - 2:
+      # the 9 nodes are already 2^j generations later; only their centres are combined
+      result = join(
+        join(c1.se, c2.sw, c4.ne, c5.nw), join(c2.se, c3.sw, c5.ne, c6.nw),
+        join(c4.se, c5.sw, c7.ne, c8.nw), join(c5.se, c6.sw, c8.ne, c9.nw)
+      )
+    else:
+      # the 9 nodes are halfway; the 4 combined nodes evolve for the other half
+      result = join(
+        successor(join(c1, c2, c4, c5), sub_j), successor(join(c2, c3, c5, c6), sub_j),
+        successor(join(c4, c5, c7, c8), sub_j), successor(join(c5, c6, c8, c9), sub_j)
+      )
+
+  _successors[key] = result
+  return result
+
+def build(cells, level, top, left):
+  """ Build the node of a level whose top left cell is (top, left) from living cells.
+    :param list cells: the coordinates of living cells inside the node.
+    :param int level: the level of node.
+    :param int top, left: the coordinates of the top left cell.
+  """
+  if not cells:
+    return empty(level)
+  if level == 0:
+    return ALIVE
+  half = 1 << (level - 1)
+  quadrants = [[], [], [], []]
+  for row_index, column_index in cells:
+    quadrants[2 * (row_index >= top + half) + (column_index >= left + half)].append(
+      (row_index, column_index)
+    )
+  return join(
+    build(quadrants[0], level - 1, top, left),
+    build(quadrants[1], level - 1, top, left + half),
+    build(quadrants[2], level - 1, top + half, left),
+    build(quadrants[3], level - 1, top + half, left + half)
+  )
+
+class HashLife:
+  """ An unbounded universe stored in a HashLife quadtree.
+    The root node covers the square whose top left cell is origin.
+  """
+  def __init__(self, root, origin=(0, 0), rows=None, columns=None):
+    """ Initializer.
+      :param Node root: the root node.
+      :param tuple origin: the coordinates of the top left cell of root.
+      :param int rows, columns: the shape of the grid produced by to_grid.
+    """
+    self.root = root
+    self.origin = origin
+    self.rows = rows
+    self.columns = columns
+
+  @classmethod
+  def from_cells(cls, cells, rows=None, columns=None):
+    """ Create a universe from the coordinates of living cells.
+      :param iterable cells: the coordinates of living cells.
+      :param int rows, columns: the shape of the grid produced by to_grid.
+    """
+    cells = list(cells)
+    top = min((row_index for row_index, column_index in cells), default=0)
+    left = min((column_index for row_index, column_index in cells), default=0)
+    size = max(
+      max((row_index - top + 1 for row_index, column_index in cells), default=1),
+      max((column_index - left + 1 for row_index, column_index in cells), default=1)
+    )
+    level = max((size - 1).bit_length(), 1)
+    return cls(build(cells, level, top, left), (top, left), rows, columns)
+
+  @classmethod
+  def from_grid(cls, grid):
+    """ Create a universe from a grid.
+      :param list grid: the grid to convert.
+    """
+    cells, rows, columns = load_sparse(grid)
+    return cls.from_cells(cells, rows, columns)
+
+  def advance(self, generations=1):
+    """ Return the universe the given number of generations later.
+      Every set bit j of generations costs one call to successor after the root is padded,
+      so a jump of 2^k generations takes O(k) steps on top of the memoized node operations.
+      :param int generations: the number of generations.
+    """
+    root = self.root
+    top, left = self.origin
+    j = 0
+    while generations:
+      if generations & 1:
+        # pad until every living cell stays inside the node returned by successor
+        while root.level < j + 3 or root.population != _inner(root).population:
+          offset = 1 << (root.level - 1)
+          root = centre(root)
+          top, left = top - offset, left - offset
+        offset = 1 << (root.level - 2)
+        root = successor(root, j)
+        top, left = top + offset, left + offset
+      generations >>= 1
+      j += 1
+    return HashLife(root, (top, left), self.rows, self.columns)
+
+  def cells(self):
+    """ Generate the coordinates of living cells. """
+    stack = [(self.root,) + self.origin]
+    while stack:
+      node, top, left = stack.pop()
+      if node.population == 0:
+        continue
+      if node.level == 0:
+        yield top, left
+        continue
+      half = 1 << (node.level - 1)
+      stack.append((node.nw, top, left))
+      stack.append((node.ne, top, left + half))
+      stack.append((node.sw, top + half, left))
+      stack.append((node.se, top + half, left + half))
+
+  @property
+  def population(self):
+    """ Return the number of living cells. """
+    return self.root.population
+
+  def to_grid(self, crop=False):
+    """ Convert the universe to a grid of the original shape.
+      Since a cell outside the grid would have been dead in the bounded grid of hw01.evolve, the universe
+      no longer matches hw01.evolve once a cell leaves the grid, which raises ValueError unless cropping.
+      With --every=N, only every Nth generation is checked.
+      :param bool crop: drop the cells outside the grid instead of raising ValueError.
+    """
+    cells = set(
+      cell for cell in self.cells() if 0 <= cell[0] < self.rows and 0 <= cell[1] < self.columns
+    )
+    if not crop and len(cells) != self.population:
+      raise ValueError(
+        'Living cells left the %d x %d grid. HashLife simulates the unbounded plane, so its generations '
+        'no longer match the other engines.' % (self.rows, self.columns)
+      )
+    return dump_sparse((cells, self.rows, self.columns))
@@ -10,10 +10,27 @@ The format is
         ...
     """
 This script accepts command line arguments, as described in NYUClasses.
+An input file whose name ends with .bin is read as a bit-packed board (see packed.py).
+Options of the form --name=value may be mixed with the positional arguments:
+    --engine=list|incremental|numpy|sparse|hashlife|parallel  the evolution engine (default: list).
+      hashlife simulates the unbounded plane instead of the bounded grid: the simulation stops with
+      ValueError when a living cell leaves the grid, since the generations would differ from then on.
+    --workers=N  the number of processes of the parallel engine (default: the number of CPUs).
+    --every=N  write every Nth generation only (default: 1).
+    --detect-cycles[=N]  stop evolving once a generation repeats one of the N most recent
+      generations (default: 1024) and write the remaining generations from the cycle.
+    --snapshots=NAME  write every written generation to a bit-packed snapshot file (see packed.py).
+    --statistics  report the number of cells evaluated per generation (incremental engine only).
 '''
 
 from copy import deepcopy
 
+NEIGHBOURS = tuple(
+  (row_offset, column_offset)
+    for row_offset in (-1, 0, 1) for column_offset in (-1, 0, 1)
+      if row_offset or column_offset
+)
+
 def input_grid(name, columns, rows):
   """ Read the initial state from an input file.
     :param str name: input file name.
@@ -67,6 +84,19 @@ def output(grids, boundary_length=32):
     output += grid
     output.append('=' * boundary_length + '\n')
   return ''.join(output)
+
+def stream_output(output_file, grids, boundary_length=32):
+  """ Write the history of evolution generation by generation.
+    The file is identical to the string returned by output if every generation is written.
+    :param file output_file: the file to write.
+    :param iterable grids: an iterable of (generation, grid) pairs.
+    :param int boundary_length: the length of the lines composed of '=' between grids.
+  """
+  boundary = '=' * boundary_length + '\n'
+  for index, grid in grids:
+    output_file.write('Generation %d:\n' % index)
+    output_file.write(output_grid(grid))
+    output_file.write(boundary)
  
 def is_living(grid, row_index, column_index):
   """ Helper function to handle the case that index is out of range.
@@ -103,33 +133,229 @@ def evolve(grid):
           resulted_grid[row_index][column_index] = True
   return resulted_grid
 
+def evolve_incremental(frontier):
+  """ Evolve a grid, evaluating only the cells whose neighbourhood changed in the previous generation.
+    :param tuple frontier: a tuple (grid, changed cells, number of evaluated cells).
+      The changed cells are None if every cell must be evaluated.
+  """
+  grid, changed, evaluated = frontier
+  rows, columns = len(grid), len(grid[0])
+  if changed is None:
+    candidates = ((row_index, column_index) for row_index in range(rows) for column_index in range(columns))
+  else:
+    candidates = set(
+      (row_index + row_offset, column_index + column_offset)
+        for row_index, column_index in changed
+          for row_offset in (-1, 0, 1) for column_offset in (-1, 0, 1)
+            if 0 <= row_index + row_offset < rows and 0 <= column_index + column_offset < columns
+    )
+
+  resulted_grid = list(grid) # rows are copied only when a cell of them changes
+  resulted_changed = set()
+  evaluated = 0
+  for row_index, column_index in candidates:
+    evaluated += 1
+    life_count = 0
+    for row_offset, column_offset in NEIGHBOURS:
+      if 0 <= row_index + row_offset < rows and 0 <= column_index + column_offset < columns:
+        life_count += grid[row_index + row_offset][column_index + column_offset]
+    cell = grid[row_index][column_index]
+    if cell != (life_count == 3 or cell and life_count == 2):
+      if resulted_grid[row_index] is grid[row_index]:
+        resulted_grid[row_index] = list(grid[row_index])
+      resulted_grid[row_index][column_index] = not cell
+      resulted_changed.add((row_index, column_index))
+  return resulted_grid, resulted_changed, evaluated
+
+def to_array(grid):
+  """ Pack a grid into a NumPy boolean array.
+    :param list grid: the grid to pack.
+  """
+  import numpy as np
+  return np.array(grid, dtype=bool)
+
+def to_grid(array):
+  """ Unpack a NumPy boolean array into a grid.
+    :param numpy.ndarray array: the array to unpack.
+  """
+  return array.tolist()
+
+def evolve_numpy(array):
+  """ Evolve a grid packed in a NumPy boolean array.
+    Neighbours are counted by summing the eight shifted views of a zero-padded copy,
+    so cells outside the grid are dead exactly as in evolve.
+    :param numpy.ndarray array: the array to evolve.
+  """
+  import numpy as np
+  rows, columns = array.shape
+  padded = np.zeros((rows + 2, columns + 2), dtype=np.uint8)
+  padded[1:-1, 1:-1] = array
+  life_count = np.zeros((rows, columns), dtype=np.uint8)
+  for row_offset in range(3):
+    for column_offset in range(3):
+      if row_offset != 1 or column_offset != 1:
+        life_count += padded[row_offset:row_offset + rows, column_offset:column_offset + columns]
+  return (life_count == 3) | (array & (life_count == 2))
+
+def repeat(evolve):
+  """ Extend a function evolving a state by one generation to a number of generations.
+    :param callable evolve: evolve(state)
+  """
+  def step(state, generations=1):
+    for g in range(generations):
+      state = evolve(state)
+    return state
+  return step
+
+def engine(name, workers=None):
+  """ Return the (load, step, dump) functions of an evolution engine.
+    load converts a grid to the state of the engine, step(state, generations=1) evolves the state
+    and dump converts the state back to a grid. States with a close method must be closed after use.
+    Every engine evolves the bounded grid, except hashlife, which evolves the unbounded plane and whose
+    dump raises ValueError once a living cell is outside the grid (see HashLife.to_grid).
+    :param str name: 'list', 'incremental', 'numpy', 'sparse', 'hashlife' or 'parallel'.
+    :param int workers: the number of processes of the parallel engine.
+  """
+  if name == 'list':
+    return (lambda grid: grid), repeat(evolve), (lambda grid: grid)
+  if name == 'incremental':
+    return (lambda grid: (grid, None, 0)), repeat(evolve_incremental), (lambda frontier: frontier[0])
+  if name == 'numpy':
+    return to_array, repeat(evolve_numpy), to_grid
+  if name == 'sparse':
+    from hashlife import load_sparse, evolve_sparse, dump_sparse
+    return load_sparse, repeat(evolve_sparse), dump_sparse
+  if name == 'hashlife':
+    from hashlife import HashLife
+    return HashLife.from_grid, HashLife.advance, HashLife.to_grid
+  if name == 'parallel':
+    from parallel import ParallelBoard
+    return (lambda grid: ParallelBoard(grid, workers)), ParallelBoard.advance, ParallelBoard.to_grid
+  raise ValueError('Unsupported engine: %s' % name)
+
+def simulate(grid, generations, name='list', every=1, monitor=None, workers=None):
+  """ Generate the (generation, grid) pairs of every Nth generation, starting from generation 0.
+    Only the current state is kept, so the memory does not grow with the number of generations.
+    :param list grid: the initial grid.
+    :param int generations: the number of generations to evolve.
+    :param str name: the name of engine.
+    :param int every: the period of generations to generate.
+    :param callable monitor: monitor(generation, state), called with the state of the engine after every
+      generation, including the generations between two generated ones.
+    :param int workers: the number of processes of the parallel engine.
+  """
+  load, step, dump = engine(name, workers)
+  state = load(grid)
+  try:
+    yield 0, grid
+    for g in range(every, generations + 1, every):
+      if monitor:
+        # step one generation at a time, so that no generation escapes the monitor
+        for k in range(g - every + 1, g + 1):
+          state = step(state)
+          monitor(k, state)
+      else:
+        state = step(state, every)
+      yield g, dump(state)
+  finally:
+    if hasattr(state, 'close'):
+      state.close()
+
+def digest(grid):
+  """ Return a digest of a grid, one byte per cell, so that equal grids have equal digests.
+    :param list grid: a grid of booleans (or a 2-dimensional numpy.ndarray of booleans).
+  """
+  import hashlib
+  hasher = hashlib.blake2b(digest_size=16)
+  for row in grid:
+    hasher.update(bytes(row))
+  return hasher.digest()
+
+def equal_grids(grid, other):
+  """ Test whether 2 grids contain the same cells.
+    :param list grid, other: grids of booleans (or 2-dimensional numpy.ndarray of booleans).
+  """
+  return len(grid) == len(other) and all(bytes(row) == bytes(other_row) for row, other_row in zip(grid, other))
+
+def detect_cycles(grids, generations, cache_size=1024, name='list', workers=None):
+  """ Stop the evolution as soon as a generation repeats one of the recent generations,
+    and generate the remaining generations from the detected cycle without simulating them.
+    Only the digests of recent generations are remembered. Once a digest repeats, the grids of the cycle
+    are rebuilt by simulating one period from the repeated grid, which also confirms that the grid repeats.
+    :param iterable grids: (generation, grid) pairs generated by simulate.
+    :param int generations: the last generation.
+    :param int cache_size: the number of recent generations remembered, i.e. the longest detected cycle.
+    :param str name: the name of engine rebuilding the cycle.
+    :param int workers: the number of processes of the parallel engine.
+  """
+  from collections import OrderedDict
+  cache = OrderedDict() # the digest of grid -> generation
+  previous = None
+  for index, grid in grids:
+    key = digest(grid)
+    if key in cache:
+      start, every = cache[key], index - previous
+      cycle = []
+      for generation, cycle_grid in simulate(grid, index - start, name, every, workers=workers):
+        cycle.append(cycle_grid)
+      if equal_grids(cycle.pop(), grid): # otherwise the digests collide
+        for generation in range(index, generations + 1, every):
+          yield generation, cycle[(generation - index) // every % len(cycle)]
+        grids.close()
+        return
+    cache[key] = index
+    if len(cache) > cache_size:
+      cache.popitem(last=False)
+    previous = index
+    yield index, grid
+
+def report_evaluated(generation, frontier):
+  """ Print the number of cells evaluated by the incremental engine in a generation.
+    :param int generation: the generation.
+    :param tuple frontier: the state of the incremental engine.
+  """
+  import sys
+  grid, changed, evaluated = frontier
+  print(
+    'Generation %d: %d of %d cells evaluated' % (generation, evaluated, len(grid) * len(grid[0])),
+    file=sys.stderr
+  )
+
 def main():
   """ Main program.
   """
   import sys
 
-  args = dict(enumerate(sys.argv[1:]))
+  options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+  args = dict(enumerate(arg for arg in sys.argv[1:] if not arg.startswith('--')))
   generations = int(args.pop(0, 10))
   input_file  = args.pop(1, 'life.txt')
   rows        = int(args.pop(2, 10))
   columns     = int(args.pop(3, 10))
 
-  grid = input_grid(input_file, columns, rows)
+  name        = options.get('engine', 'list')
+  every       = int(options.get('every', 1))
+  monitor     = report_evaluated if 'statistics' in options else None
+  workers     = int(options['workers']) if 'workers' in options else None
+  assert monitor is None or name == 'incremental', 'Statistics are only reported by the incremental engine.'
 
-  history = [] # the history of evolution
-  history.append(grid)
-  current_grid = grid
+  if input_file.endswith('.bin'):
+    from packed import input_packed
+    grid = input_packed(input_file, columns, rows)
+    if name not in ('numpy', 'parallel'):
+      grid = grid.tolist()
+  else:
+    grid = input_grid(input_file, columns, rows)
 
-  for g in range(generations):
-    current_grid = evolve(current_grid)
-    history.append(current_grid)
+  grids = simulate(grid, generations, name, every, monitor, workers)
+  if 'detect-cycles' in options:
+    grids = detect_cycles(grids, generations, int(options['detect-cycles'] or 1024), name, workers)
+  if 'snapshots' in options:
+    from packed import snapshot
+    grids = snapshot(grids, options['snapshots'], (len(grid), len(grid[0])))
 
   with open('output.txt', 'w') as output_file:
-    output_file.write(
-      output(
-        [output_grid(h) for h in history]
-      )
-    )
+    stream_output(output_file, grids)
 
 if __name__ == '__main__':
   main()
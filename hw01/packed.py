@@ -0,0 +1,169 @@
+'''
+Bit-packed binary boards of Conway's Game of Life.
+
+A packed file starts with a header (the magic bytes LIFE, the number of rows and the number of
+columns as little-endian unsigned 32-bit integers) followed by one or more frames. A frame stores a
+board row by row, 1 bit per cell, every row padded to a whole number of bytes. A board file holds
+a single frame; a snapshot file holds one frame per written generation.
+
+Files are memory-mapped, so loading a frame does not parse anything and only touches its pages.
+
+Command line usage:
+    python3 packed.py pack life.txt life.bin
+    python3 packed.py unpack life.bin life.txt [frame]
+'''
+
+import struct
+
+import numpy as np
+
+MAGIC = b'LIFE'
+HEADER = struct.Struct('<4sII')
+
+class PackedFile:
+  """ A memory-mapped packed file. Indexing returns the board of a frame as a NumPy boolean array. """
+  def __init__(self, name):
+    """ Initializer.
+      :param str name: file name.
+    """
+    with open(name, 'rb') as input_file:
+      magic, rows, columns = HEADER.unpack(input_file.read(HEADER.size))
+    assert magic == MAGIC, '%s is not a packed board.' % name
+    self.shape = rows, columns
+    row_bytes = (columns + 7) // 8
+    self._frames = np.memmap(name, dtype=np.uint8, mode='r', offset=HEADER.size)
+    self._frames = self._frames.reshape(-1, rows, row_bytes)
+
+  def __len__(self):
+    return len(self._frames)
+
+  def __getitem__(self, frame):
+    return np.unpackbits(self._frames[frame], axis=-1, count=self.shape[1]).view(np.bool_)
+
+  def rows(self, frame):
+    """ Generate the rows of a frame one at a time as NumPy boolean arrays.
+      :param int frame: the frame.
+    """
+    for row in self._frames[frame]:
+      yield np.unpackbits(row, count=self.shape[1]).view(np.bool_)
+
+class SnapshotWriter:
+  """ Append boards of the same shape to a packed file, one frame per board. """
+  def __init__(self, name, shape):
+    """ Initializer.
+      :param str name: file name.
+      :param tuple shape: the shape of boards, (rows, columns).
+    """
+    self.shape = tuple(shape)
+    self._file = open(name, 'wb')
+    self._file.write(HEADER.pack(MAGIC, *self.shape))
+
+  def write(self, board):
+    """ Append a board.
+      :param list / numpy.ndarray board: the board to append.
+    """
+    board = np.asarray(board, dtype=np.bool_)
+    assert board.shape == self.shape, 'Every snapshot must be of shape %s.' % (self.shape,)
+    self._file.write(np.packbits(board, axis=-1).tobytes())
+
+  def close(self):
+    self._file.close()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, *args):
+    self.close()
+
+def write_packed(name, board):
+  """ Write a board to a packed file.
+    :param str name: file name.
+    :param list / numpy.ndarray board: the board to write.
+  """
+  board = np.asarray(board, dtype=np.bool_)
+  with SnapshotWriter(name, board.shape) as writer:
+    writer.write(board)
+
+def input_packed(name, columns, rows, frame=0):
+  """ Read the initial state from a packed file. Follows the conventions of hw01.input_grid.
+    :param str name: input file name.
+    :param int columns: the number of columns.
+    :param int rows: the number of rows.
+    :param int frame: the frame to read.
+  """
+  board = PackedFile(name)[frame]
+  if rows:
+    assert rows >= board.shape[0]
+  else:
+    rows = board.shape[0]
+  if columns:
+    assert columns >= board.shape[1]
+  else:
+    columns = board.shape[1]
+  if board.shape != (rows, columns):
+    padded_board = np.zeros((rows, columns), dtype=np.bool_)
+    padded_board[:board.shape[0], :board.shape[1]] = board
+    board = padded_board
+  return board
+
+def snapshot(grids, name, shape):
+  """ Write every grid generated by hw01.simulate to a snapshot file, passing the grids through.
+    :param iterable grids: (generation, grid) pairs.
+    :param str name: file name.
+    :param tuple shape: the shape of grids.
+  """
+  with SnapshotWriter(name, shape) as writer:
+    for index, grid in grids:
+      writer.write(grid)
+      yield index, grid
+
+def pack(text_name, packed_name):
+  """ Convert a text board in the format of life.txt to a packed file, one row at a time.
+    Rows are counted like hw01.input_grid, which splits the text on newlines: a trailing newline ends
+    with an empty row, so both read the same board.
+    :param str text_name: text file name.
+    :param str packed_name: packed file name.
+  """
+  rows = columns = 0
+  line = '\n'
+  with open(text_name, 'r') as text_file:
+    for line in text_file:
+      rows += 1
+      columns = max(columns, len(line.rstrip('\n')))
+  # the empty row after a trailing newline (or the only row of an empty file)
+  trailing_row = line.endswith('\n')
+
+  with open(text_name, 'r') as text_file, open(packed_name, 'wb') as packed_file:
+    packed_file.write(HEADER.pack(MAGIC, rows + trailing_row, columns))
+    for line in text_file:
+      line = line.rstrip('\n')
+      row = np.zeros(columns, dtype=np.bool_)
+      row[:len(line)] = np.frombuffer(line.encode('ascii'), dtype=np.uint8) == ord('*')
+      packed_file.write(np.packbits(row).tobytes())
+    if trailing_row:
+      packed_file.write(np.packbits(np.zeros(columns, dtype=np.bool_)).tobytes())
+
+def unpack(packed_name, text_name, frame=0):
+  """ Convert a frame of a packed file to a text board in the format of hw01.output_grid, one row at a time.
+    :param str packed_name: packed file name.
+    :param str text_name: text file name.
+    :param int frame: the frame to convert.
+  """
+  symbols = np.array([ord('-'), ord('*')], dtype=np.uint8)
+  with open(text_name, 'wb') as text_file:
+    for row in PackedFile(packed_name).rows(frame):
+      text_file.write(symbols[row.view(np.uint8)].tobytes())
+      text_file.write(b'\n')
+
+def main():
+  """ Main program. """
+  import sys
+  if sys.argv[1] == 'pack':
+    pack(sys.argv[2], sys.argv[3])
+  elif sys.argv[1] == 'unpack':
+    unpack(sys.argv[2], sys.argv[3], int(sys.argv[4]) if len(sys.argv) > 4 else 0)
+  else:
+    raise ValueError('Unsupported command: %s' % sys.argv[1])
+
+if __name__ == '__main__':
+  main()
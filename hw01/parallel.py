@@ -0,0 +1,86 @@
+'''
+Multi-core evolution of Conway's Game of Life.
+
+The board is split into row bands, one per worker of a process pool. Two boards live in shared
+memory: every generation, each worker reads its band plus one halo row above and below from the
+current board and writes the evolved band to the other board, then the roles of the boards swap.
+Only band indexes are sent to the workers, never the board itself.
+'''
+
+from multiprocessing import Pool, cpu_count
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from hw01 import evolve_numpy
+
+_boards = [] # the boards attached by a worker
+
+def _attach(names, shape):
+  """ Attach the shared boards in a worker.
+    :param list names: the names of shared memory blocks.
+    :param tuple shape: the shape of boards.
+  """
+  for name in names:
+    memory = SharedMemory(name=name)
+    _boards.append((memory, np.ndarray(shape, dtype=np.bool_, buffer=memory.buf)))
+
+def _evolve_band(current, start, stop):
+  """ Evolve rows [start, stop) of the current board into the other board.
+    :param int current: the index of the current board.
+    :param int start, stop: the range of rows.
+  """
+  board = _boards[current][1]
+  resulted_board = _boards[1 - current][1]
+  top = max(start - 1, 0)
+  bottom = min(stop + 1, board.shape[0])
+  # the halo rows are evolved incorrectly since their neighbours are missing, so they are dropped
+  resulted_board[start:stop] = evolve_numpy(board[top:bottom])[start - top:stop - top]
+
+class ParallelBoard:
+  """ A board evolved by a pool of processes over shared memory. """
+  def __init__(self, grid, workers=None):
+    """ Initializer.
+      :param list grid: the initial grid.
+      :param int workers: the number of processes (default: the number of CPUs).
+    """
+    array = np.array(grid, dtype=np.bool_)
+    self.shape = array.shape
+    workers = min(workers or cpu_count(), self.shape[0])
+    self._memories = [SharedMemory(create=True, size=max(array.size, 1)) for i in range(2)]
+    self._boards = [
+      np.ndarray(self.shape, dtype=np.bool_, buffer=memory.buf) for memory in self._memories
+    ]
+    self._boards[0][:] = array
+    self._current = 0
+    boundaries = [self.shape[0] * i // workers for i in range(workers + 1)]
+    self._bands = list(zip(boundaries[:-1], boundaries[1:]))
+    self._pool = Pool(
+      workers, initializer=_attach, initargs=([memory.name for memory in self._memories], self.shape)
+    )
+
+  def advance(self, generations=1):
+    """ Evolve the board in place.
+      :param int generations: the number of generations.
+    """
+    for g in range(generations):
+      self._pool.starmap(_evolve_band, [(self._current, start, stop) for start, stop in self._bands])
+      self._current = 1 - self._current
+    return self
+
+  def to_array(self):
+    """ Return a copy of the current board as a NumPy boolean array. """
+    return self._boards[self._current].copy()
+
+  def to_grid(self):
+    """ Return the current board as a grid. """
+    return self._boards[self._current].tolist()
+
+  def close(self):
+    """ Stop the workers and release the shared memory. """
+    self._pool.close()
+    self._pool.join()
+    self._boards = []
+    for memory in self._memories:
+      memory.close()
+      memory.unlink()
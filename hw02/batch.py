@@ -0,0 +1,122 @@
+"""
+
+Batched polygons for hw02.
+
+A PolygonBatch stores the vertexes of many polygons in structure-of-arrays layout:
+  vertexes: one contiguous (total vertexes, 2) array of the vertexes of all polygons.
+  offsets: the vertexes of polygon i are vertexes[offsets[i]:offsets[i + 1]].
+Perimeters and areas of the whole batch are computed in a few vectorized passes instead of one
+Python object and one generator per polygon.
+
+The vertexes are stored as float64, like the vertexes of NontriangularPolygon and Triangle, so the results
+agree with NontriangularPolygon.perimeter / area and Triangle.area up to the rounding of summation.
+
+Command line options:
+  If no argument provided, the script executes all test cases.
+
+"""
+
+import numpy as np
+
+class PolygonBatch:
+  """ A batch of polygons specified by vertex coordinates. """
+  def __init__(self, vertexes, offsets):
+    """ Initialize a batch given the contiguous vertexes and the offsets of polygons.
+      :param numpy.ndarray vertexes: (total vertexes, 2) coordinates.
+      :param numpy.ndarray offsets: (polygons + 1,) indexes. offsets[0] == 0 and offsets[-1] == len(vertexes).
+    """
+    self._vertexes = np.ascontiguousarray(vertexes, dtype=np.float64)
+    self._offsets = np.ascontiguousarray(offsets, dtype=np.int64)
+    assert self._vertexes.ndim == 2 and self._vertexes.shape[1] == 2, 'Only 2-dimensional vertexes are supported.'
+    assert self._offsets[0] == 0 and self._offsets[-1] == len(self._vertexes), 'Offsets do not match vertexes.'
+    assert np.all(np.diff(self._offsets) >= 3), 'Every polygon should have at least 3 vertexes.'
+
+  @classmethod
+  def from_counts(cls, vertexes, counts):
+    """ Create a batch given the contiguous vertexes and the number of vertexes of every polygon. """
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return cls(vertexes, offsets)
+
+  @classmethod
+  def from_vertexes(cls, polygons):
+    """ Create a batch given the vertexes of every polygon.
+      :param iterable polygons: sequences of (x, y) tuples or numpy.ndarray vertexes, e.g. [[(0, 0), (1, 0), (0, 1)], ...]
+    """
+    vertexes, counts = [], []
+    for polygon in polygons:
+      counts.append(len(polygon))
+      vertexes.extend(polygon)
+    return cls.from_counts(np.array(vertexes, dtype=np.float64).reshape(-1, 2), counts)
+
+  @classmethod
+  def from_polygons(cls, polygons):
+    """ Create a batch given NontriangularPolygon objects specified by vertexes. """
+    vertexes = []
+    for polygon in polygons:
+      assert polygon._cartesian, 'Only polygons specified by vertex coordinate can be batched.'
+      vertexes.append(polygon._vertexes)
+    return cls.from_vertexes(vertexes)
+
+  def __len__(self):
+    return len(self._offsets) - 1
+
+  def __getitem__(self, index):
+    """ Return the vertexes of a polygon as a view of the batch. """
+    return self._vertexes[self._offsets[index]:self._offsets[index + 1]]
+
+  def counts(self):
+    """ Return the number of vertexes of every polygon. """
+    return np.diff(self._offsets)
+
+  def _edges(self):
+    """ Return the vector from every vertex to the next vertex of the same polygon. """
+    next_indexes = np.arange(1, len(self._vertexes) + 1)
+    next_indexes[self._offsets[1:] - 1] = self._offsets[:-1] # the last vertex is followed by the first vertex
+    return self._vertexes, self._vertexes[next_indexes]
+
+  def perimeters(self):
+    """ Calculate the perimeters of all polygons. """
+    vertexes, next_vertexes = self._edges()
+    lengths = np.hypot(*(next_vertexes - vertexes).T)
+    return np.add.reduceat(lengths, self._offsets[:-1])
+
+  def areas(self):
+    """ Calculate the areas of all polygons by the shoelace formula.
+      The formula is described in
+        http://mathworld.wolfram.com/PolygonArea.html
+    """
+    vertexes, next_vertexes = self._edges()
+    crosses = vertexes[:, 0] * next_vertexes[:, 1] - next_vertexes[:, 0] * vertexes[:, 1]
+    return 0.5 * np.abs(np.add.reduceat(crosses, self._offsets[:-1]))
+
+def test():
+  """ Test cases
+  """
+  from hw02 import Triangle, NontriangularPolygon, generate_coordinates
+
+  random = np.random.RandomState(0)
+  polygons = [generate_coordinates(n) for n in range(3, 12)]
+  # random convex polygons: points sorted by angle around the origin
+  for n in random.randint(3, 64, size=128):
+    angles = np.sort(random.uniform(0, 2 * np.pi, n))
+    radiuses = random.uniform(0.5, 2.0, n)
+    polygons.append([(r * np.cos(phi), r * np.sin(phi)) for r, phi in zip(radiuses, angles)])
+  # a rectangle far from the origin, whose coordinates float32 would round
+  polygons.append([(1E5, 1E5), (1E5 + 1.1, 1E5), (1E5 + 1.1, 1E5 + 1.3), (1E5, 1E5 + 1.3)])
+  batch = PolygonBatch.from_vertexes(polygons)
+
+  expected_perimeters, expected_areas = [], []
+  for vertexes in polygons:
+    polygon = Triangle(*vertexes) if len(vertexes) == 3 else NontriangularPolygon(*vertexes)
+    expected_perimeters.append(polygon.perimeter())
+    expected_areas.append(polygon.area())
+
+  print('batched perimeter test', np.allclose(batch.perimeters(), expected_perimeters, rtol=1E-9, atol=0))
+  print('batched area test', np.allclose(batch.areas(), expected_areas, rtol=1E-9, atol=0))
+  print('batched polygons test', np.allclose(
+    PolygonBatch.from_polygons(NontriangularPolygon(*vertexes) for vertexes in polygons[1:]).areas(), expected_areas[1:]
+  ))
+
+if __name__ == '__main__':
+  test()
@@ -12,6 +12,11 @@ Command line options:
     python3 hw02.py RegularPentagon 1
   To test similarity:
     python3 hw02.py similar Triangle [0,0] [0,1] [1,0] Triangle [1,1] [1,0] [0,1]   
+  To evaluate the perimeter and area of every shape in a file (or in stdin if the file is - or omitted),
+  one shape per line in the syntax above (e.g. Quadrilateral [0,0] [1,0] [1,1] [0,1]):
+    python3 hw02.py bulk shapes.txt [--format=csv|jsonl] [--workers=N] [--chunk-size=N]
+    The results are written to stdout in the order of lines, as CSV (default) or JSON lines.
+    Chunks of lines are evaluated on a pool of N processes (default: the number of CPUs).
 
 Inheritance hierarchy:
   Polygon
@@ -38,6 +43,7 @@ The mechanism of test cases:
 
 """
 
+import functools
 import math
 import cmath
 import numpy as np
@@ -47,6 +53,18 @@ import numpy.linalg as la
 # HELPER CLASSES AND FUNCTIONS START #
 ######################################
 
+def cached(method):
+  """ Decorate a method of a polygon so that its value is computed once per arguments and then cached.
+    The cache is cleared whenever an attribute of the polygon is assigned (see Polygon.__setattr__).
+  """
+  @functools.wraps(method)
+  def cached_method(self, *args, **kwargs):
+    key = (method.__name__,) + args + tuple(sorted(kwargs.items()))
+    if key not in self._cache:
+      self._cache[key] = method(self, *args, **kwargs)
+    return self._cache[key]
+  return cached_method
+
 def all_positive(*args):
   """ Test whether all numbers are positive. """
   return all(arg > 0 for arg in args)
@@ -95,17 +113,177 @@ def parse_polygon(*args):
       parameters.append(tuple(float(value) for value in arg.split(',')))
     else:
       parameters.append(float(arg))
-  polygon = getattr(__import__('hw02'), shape)(*parameters)
+  polygon = shape_class(shape)(*parameters)
   return polygon
 
+@functools.lru_cache(maxsize=None)
+def shape_class(name):
+  """ Find the class of a shape given its name. The classes are looked up once per name. """
+  shape = globals().get(name)
+  if not (isinstance(shape, type) and issubclass(shape, Polygon)):
+    raise ValueError('Unsupported shape: %s' % name)
+  return shape
+
+def inner_angles(vertexes):
+  """ Calculate the inner angles of a polygon in radians given the coordinates of vertexes.
+    The angles of concave vertexes are greater than pi.
+  """
+  vertexes = np.asarray(vertexes, dtype=np.float64)
+  incoming = vertexes - np.roll(vertexes, 1, axis=0)
+  outgoing = np.roll(vertexes, -1, axis=0) - vertexes
+  crosses = incoming[:, 0] * outgoing[:, 1] - incoming[:, 1] * outgoing[:, 0]
+  turns = np.arctan2(crosses, np.sum(incoming * outgoing, axis=1))
+  # the turns of a simple polygon sum to 2 pi if its vertexes are anticlockwise and to -2 pi otherwise
+  orientation = 1.0 if np.sum(turns) >= 0 else -1.0
+  return np.pi - orientation * turns
+
+def partition_area(vertexes):
+  """ Calculate the area of a polygon given the coordinates of vertexes by the partition of
+    NontriangularPolygon.area(mode='recursive'), but iteratively over arrays of vertex indexes.
+    Every level cuts the triangles (i, i + 1, i + 2) for even i off the polygon and keeps the polygon of the even
+    vertexes, so there are O(log n) levels of vectorized operations and O(n) work in total.
+    The areas of triangles are signed, so that the triangles outside concave polygons are subtracted.
+  """
+  vertexes = np.asarray(vertexes, dtype=np.float64)
+  indexes = np.arange(len(vertexes))
+  areas = []
+  while len(indexes) >= 3:
+    n = len(indexes)
+    corners = [indexes[0:n - 2:2], indexes[1:n - 1:2], indexes[2:n:2]]
+    if n % 2 == 0:
+      # the last triangle wraps around to the first vertex
+      corners = [np.append(corner, indexes[k]) for corner, k in zip(corners, (-2, -1, 0))]
+    a, b, c = (vertexes[corner] for corner in corners)
+    left, right = b - a, c - a
+    areas.append(0.5 * (left[:, 0] * right[:, 1] - left[:, 1] * right[:, 0]))
+    indexes = indexes[::2]
+  return abs(math.fsum(np.concatenate(areas))) if areas else 0.0
+
+def least_rotation(sequence):
+  """ Find the offset of the lexicographically least rotation of a sequence by Booth's algorithm in O(n).
+    :param list sequence: comparable items.
+  """
+  doubled = list(sequence) * 2
+  failure = [-1] * len(doubled)
+  k = 0
+  for j in range(1, len(doubled)):
+    item = doubled[j]
+    i = failure[j - k - 1]
+    while i != -1 and item != doubled[k + i + 1]:
+      if item < doubled[k + i + 1]:
+        k = j - i - 1
+      i = failure[i]
+    if item != doubled[k + i + 1]: # i == -1
+      if item < doubled[k]:
+        k = j
+      failure[j - k] = -1
+    else:
+      failure[j - k] = i + 1
+  return k
+
+def normalized_pairs(angles, sides):
+  """ Pair the inner angle at every vertex with the ratio of the next side to the mean side.
+    :param list angles: the inner angle at every vertex.
+    :param list sides: the side from every vertex to the next vertex.
+  """
+  scale = len(sides) / math.fsum(sides)
+  return [(float(angle), float(side) * scale) for angle, side in zip(angles, sides)]
+
+def reflect_pairs(pairs):
+  """ Return the pairs of vertexes in the opposite orientation, in which vertex i is followed by side i - 1. """
+  return [(pairs[i][0], pairs[i - 1][1]) for i in range(len(pairs) - 1, -1, -1)]
+
+def similar_pairs(pattern, pairs, tolerance):
+  """ Test whether two sequences of (angle, side ratio) pairs are equal up to rotation and reflection.
+    Equality within a tolerance is not transitive, so string matching (KMP) does not apply. Instead, the candidate
+    first vertexes are the pairs within tolerance of the first pair of pattern, found in one vectorized pass per
+    orientation, and every candidate is checked against the whole pattern in another vectorized pass.
+    That is O(n) unless many pairs are within tolerance of the first pair, e.g. for nearly regular polygons.
+    :param list pattern, pairs: the pairs of two polygons. See normalized_pairs.
+    :param float tolerance: the largest difference between equal angles (in radians) or side ratios.
+  """
+  if len(pattern) != len(pairs):
+    return False
+  pattern = np.array(pattern, dtype=np.float64)
+  for sequence in (pairs, reflect_pairs(pairs)):
+    sequence = np.array(sequence, dtype=np.float64)
+    # the last pair is not doubled, since the match starting there is the match starting at the first pair
+    doubled = np.concatenate((sequence, sequence[:-1]))
+    for offset in np.flatnonzero(np.all(np.abs(sequence - pattern[0]) <= tolerance, axis=1)):
+      if np.all(np.abs(doubled[offset:offset + len(pattern)] - pattern) <= tolerance):
+        return True
+  return False
+
+def canonical_rotation(cells):
+  """ Return the least rotation, in either orientation, of a sequence of (angle cell, side ratio cell) pairs. """
+  candidates = []
+  for sequence in (cells, reflect_pairs(cells)):
+    offset = least_rotation(sequence)
+    candidates.append(tuple(sequence[offset:] + sequence[:offset]))
+  return min(candidates)
+
+def similarity_signature(pairs, decimals=2):
+  """ Calculate the similarity signature of a polygon, which does not depend on its position, rotation,
+    reflection, scale and first vertex.
+    The signature is the canonical rotation of the pairs quantized to cells of width 10 ** -decimals. Similar
+    polygons have equal signatures, unless an angle or side ratio lies near the boundary of a cell, so that a
+    similar polygon may fall in the neighbouring cell (see similarity_signatures).
+    :param list pairs: the pairs of a polygon. See normalized_pairs.
+    :param int decimals: the number of decimals kept by cells.
+  """
+  scale = 10 ** decimals
+  return canonical_rotation([(math.floor(angle * scale), math.floor(ratio * scale)) for angle, ratio in pairs])
+
+def similarity_signatures(pairs, decimals=2, tolerance=1E-4, limit=8):
+  """ Calculate the signatures of all polygons whose pairs differ from pairs by at most tolerance.
+    A value within tolerance of the boundary of a cell may lie in the neighbouring cell for such a polygon,
+    so every combination of both cells is quantized, i.e. 2 ** k signatures for k values near boundaries.
+    Return None if k exceeds limit.
+    :param list pairs: the pairs of a polygon. See normalized_pairs.
+    :param int decimals: the number of decimals kept by cells. Cells should be wider than 2 * tolerance.
+    :param float tolerance: the largest difference between equal angles (in radians) or side ratios.
+    :param int limit: the largest number of values near boundaries.
+  """
+  from itertools import product
+
+  scale = 10 ** decimals
+  cells, neighbours = [], []
+  for index, pair in enumerate(pairs):
+    cells.append([])
+    for position, value in enumerate(pair):
+      cell = math.floor(value * scale)
+      cells[-1].append(cell)
+      for neighbour in (math.floor((value - tolerance) * scale), math.floor((value + tolerance) * scale)):
+        if neighbour != cell:
+          neighbours.append((index, position, neighbour))
+  if len(neighbours) > limit:
+    return None
+  signatures = set()
+  for choices in product((False, True), repeat=len(neighbours)):
+    sequence = [list(pair) for pair in cells]
+    for chosen, (index, position, neighbour) in zip(choices, neighbours):
+      if chosen:
+        sequence[index][position] = neighbour
+    signatures.add(canonical_rotation([tuple(pair) for pair in sequence]))
+  return signatures
+
 ##################################
 # HELP CLASSES AND FUNCTIONS END #
 ##################################
 
 class Polygon:
-  """ The abstract base class of polygons. """
+  """ The abstract base class of polygons.
+    Polygons are immutable: the arrays of vertexes are read-only, and the values derived from them
+    (perimeter, area, angles, signature) are cached. Assigning an attribute clears the cache.
+  """
+  __slots__ = ('_cache',)
+
   def __init__(self, *args):
     raise NotImplementedError()
+  def __setattr__(self, name, value):
+    object.__setattr__(self, name, value)
+    if name != '_cache':
+      object.__setattr__(self, '_cache', {})
   def perimeter(self):
     raise NotImplementedError()
   def area(self):
@@ -115,21 +293,23 @@ class Polygon:
 
 class Triangle(Polygon):
   """ The base class of triangles. """
+  __slots__ = ('a', 'b', 'c')
+
   def __init__(self, a, b, c):
     """ Initialize a triangle object given sides or vertexes.
       :param float / tuple / numpy.ndarray a, b, c : sides or vertexes.
     """
     if all(isinstance(vertex, tuple) for vertex in (a, b, c)):
-      a = np.array(list(a), dtype=np.float32)
-      b = np.array(list(b), dtype=np.float32)
-      c = np.array(list(c), dtype=np.float32)
+      a = np.array(list(a), dtype=np.float64)
+      b = np.array(list(b), dtype=np.float64)
+      c = np.array(list(c), dtype=np.float64)
     if all(isinstance(vertex, np.ndarray) for vertex in (a, b, c)):
       vertexes = [a, b, c]
       if compatible_in_dimension(*vertexes):
         # calculate sides given vertexes
-        a = la.linalg.norm(vertexes[1] - vertexes[2])
-        b = la.linalg.norm(vertexes[0] - vertexes[2])
-        c = la.linalg.norm(vertexes[0] - vertexes[1])
+        a = la.norm(vertexes[1] - vertexes[2])
+        b = la.norm(vertexes[0] - vertexes[2])
+        c = la.norm(vertexes[0] - vertexes[1])
       else:
         raise IncompatibleDimensionError(a, b, c)
 
@@ -140,9 +320,11 @@ class Triangle(Polygon):
     assert 2 * max(self.a, self.b, self.c) < self.a + self.b + self.c, \
       'The given sides cannot form a triangle.'
 
+  @cached
   def perimeter(self):
     return self.a + self.b + self.c
 
+  @cached
   def area(self):
     cosine_C = cosine(self.a, self.b, self.c)
     return 0.5 * self.a * self.b * ((1 - cosine_C ** 2) ** 0.5)
@@ -162,7 +344,28 @@ class Triangle(Polygon):
     # Ensure all inner angles are equal.
     return self_angles == triangle_angles
 
+  @cached
+  def angles(self):
+    """ Calculate the inner angles in radians, opposite to sides a, b and c respectively. """
+    return tuple(
+      math.acos(max(-1.0, min(1.0, cosine(*sides))))
+        for sides in ((self.b, self.c, self.a), (self.c, self.a, self.b), (self.a, self.b, self.c))
+    )
+
+  @cached
+  def _similarity_pairs(self):
+    """ Return the (angle, side ratio) pairs of the vertexes. See normalized_pairs. """
+    # vertexes A, B, C are opposite to sides a, b, c, so A is followed by side c, B by a and C by b
+    return tuple(normalized_pairs(self.angles(), (self.c, self.a, self.b)))
+
+  @cached
+  def signature(self, decimals=2):
+    """ Calculate the similarity signature. See similarity_signature. """
+    return similarity_signature(self._similarity_pairs(), decimals)
+
 class IsoscelesTriangle(Triangle):
+  __slots__ = ()
+
   def __init__(self, leg, base):
     super().__init__(leg, leg, base)
 
@@ -171,6 +374,8 @@ class IsoscelesTriangle(Triangle):
     return 0.5 * self.c * (self.a ** 2 - 0.25 * self.c ** 2) ** 0.5
 
 class EquilateralTriangle(IsoscelesTriangle):
+  __slots__ = ()
+
   def __init__(self, l):
     super().__init__(l, l)
 
@@ -182,35 +387,48 @@ class EquilateralTriangle(IsoscelesTriangle):
     """ Base class method is overridden for efficiency. """
     return 0.25 * (3 ** 0.5) * (self.a ** 2)
 
-class NontriangularPolygon:
+class NontriangularPolygon(Polygon):
   """ The base class for all n-gons. (n > 3) """
+  __slots__ = ('_cartesian', '_vertexes', '_sides')
+
   def __init__(self, *args):
     """ Initialize a NontriangularPolygon object given sides or vertexes. 
       :param float / tuple / numpy.array: sides or vertexes. 
     """
     if all(isinstance(arg, (tuple, np.ndarray)) for arg in args):
       self._cartesian = True
-      if isinstance(args[0], tuple):
-        self._vertexes = tuple(np.array(list(arg), dtype=np.float32) for arg in args)
-      else:
-        self._vertexes = tuple(args)
-      if compatible_in_dimension(*self._vertexes):
-        self._sides = []
-        for i, vertex in enumerate(self._vertexes):
-          next_vertex = self._vertexes[(i + 1) % len(self._vertexes)]
-          self._sides.append(la.norm(self._vertexes[i] - next_vertex))
+      vertexes = tuple(np.array(arg, dtype=np.float64) if isinstance(arg, tuple) else arg.astype(np.float64) for arg in args)
+      for vertex in vertexes:
+        vertex.flags.writeable = False
+      if not compatible_in_dimension(*vertexes):
+        raise IncompatibleDimensionError(*vertexes)
+      self._vertexes = vertexes
+      self._sides = tuple(
+        la.norm(vertex - vertexes[(i + 1) % len(vertexes)]) for i, vertex in enumerate(vertexes)
+      )
     else:
       self._cartesian = False
-      self._sides = [float(arg) for arg in args]
+      self._sides = tuple(float(arg) for arg in args)
 
     # Check whether the sides can form a polygon.
     assert all(side > 0 for side in self._sides)
     if not self._cartesian:
       assert 2 * max(self._sides) < math.fsum(self._sides)
 
+  @property
+  def vertexes(self):
+    """ The read-only vertexes. Assigning vertexes recomputes the sides and clears the cache. """
+    return self._vertexes
+
+  @vertexes.setter
+  def vertexes(self, vertexes):
+    NontriangularPolygon.__init__(self, *vertexes)
+
+  @cached
   def perimeter(self):
     return math.fsum(self._sides)
 
+  @cached
   def area(self, mode='formula'):
     """ Calculate area.
       :param str mode: 'recursive' or 'formula
@@ -219,25 +437,9 @@ class NontriangularPolygon:
       if mode == 'recursive':
         '''
           The algorithm recursively partition the n-gon to smaller polygon and triangles.
+          The partition is computed level by level without recursion. See partition_area.
         '''
-        triangles = []
-        inner_polygon_vertexes = []
-        # Figure out the vertexes of sub-triangles and sub-polygon.
-        for i in range(0, len(self._vertexes), 2):
-          inner_polygon_vertexes.append(self._vertexes[i])
-          if len(self._vertexes) - 3 < i:
-            if i == len(self._vertexes) - 2:
-              triangles.append(Triangle(self._vertexes[-2], self._vertexes[-1], self._vertexes[0]))
-          else:
-            triangles.append(Triangle(self._vertexes[i], self._vertexes[i + 1], self._vertexes[i + 2]))
-
-        # Calculate the area of sub-polygon
-        polygon_area = 0 if len(inner_polygon_vertexes) == 2 else \
-          Triangle(*inner_polygon_vertexes).area() if len(inner_polygon_vertexes) == 3 else\
-          NontriangularPolygon(*inner_polygon_vertexes).area()
-
-        # Sum the areas of sub-triangles and sub-polygon.
-        return math.fsum(triangle.area() for triangle in triangles) + polygon_area
+        return partition_area(self._vertexes)
 
       if mode == 'formula':
         '''
@@ -260,66 +462,44 @@ class NontriangularPolygon:
         "A polygon's area cannot be calculated if the polygon is not specified by vertex coordinate."
       )
 
-  def similar_to(self, polygon):
+  def similar_to(self, polygon, tolerance=1E-4):
+    """ Test similarity, usually in O(n). See similar_pairs.
+      :param NontriangularPolygon polygon: a polygon specified by vertex coordinate.
+      :param float tolerance: the largest difference between equal angles (in radians) or side ratios.
+    """
     # check the equality of vertex numbers
     if len(self._vertexes) != len(polygon._vertexes):
       return False
+    return similar_pairs(self._similarity_pairs(), polygon._similarity_pairs(), tolerance)
 
-    # compute inner angles (modular operation is used to calculate the last angle)
-    total_vertexes = len(self._vertexes)
-    self_angles = [
-      round(vector_angle(vertex - self._vertexes[i - 1], vertex - self._vertexes[(i + 1) % total_vertexes]), 2) \
-        for i, vertex in enumerate(self._vertexes)
-    ]
-    polygon_angles = [
-      round(vector_angle(vertex - self._vertexes[i - 1], vertex - self._vertexes[(i + 1) % total_vertexes]), 2) \
-        for i, vertex in enumerate(self._vertexes)
-    ]
+  @cached
+  def _similarity_pairs(self):
+    """ Return the (angle, side ratio) pairs of the vertexes. See normalized_pairs. """
+    return tuple(normalized_pairs(self.angles(), self._sides))
 
-    # check similarity
-    offsets = [i for i, angle in enumerate(polygon_angles) if self_angles[0] == angle]
-    for offset in offsets:
-      # determine the sequences of angles and sides should be matched clockwise, anticlockwise
-      # exit loop if the sequences cannot be matched
-
-      # check the equality of angles
-      clockwise = True
-      for i, angle in enumerate(self_angles):
-        if angle != polygon_angles[(i + offset) % total_vertexes]:
-          clockwise = False
-          break
-      anticlockwise = True
-      for i, angle in enumerate(self_angles):
-        if angle != polygon_angles[(offset - i) % total_vertexes]:
-          anticlockwise = False
-          break
-      if not (clockwise or anticlockwise):
-        break
-      
-      # check the proportionality of sides only if angles are equal
-      # check the proportionality of sides and return True if sides are proportional
-      ratio = self._sides[0] / polygon._sides[offset]
-      if clockwise:
-        if all(
-          self_side / polygon._sides[(i + offset) % total_vertexes] == ratio \
-            for i, self_side in enumerate(self._sides)
-        ):
-          return True
-      if anticlockwise:
-        print(self._sides, polygon._sides)
-        if all(
-          self_side / polygon._sides[(offset - i) % total_vertexes] == ratio \
-            for i, self_side in enumerate(self._sides)
-        ):
-          return True
+  @cached
+  def angles(self):
+    """ Calculate the inner angles in radians. See inner_angles. """
+    if not self._cartesian:
+      raise Exception(
+        "A polygon's angles cannot be calculated if the polygon is not specified by vertex coordinate."
+      )
+    return tuple(inner_angles(self._vertexes).tolist())
 
-    return False
+  @cached
+  def signature(self, decimals=2):
+    """ Calculate the similarity signature. See similarity_signature. """
+    return similarity_signature(self._similarity_pairs(), decimals)
 
 class Quadrilateral(NontriangularPolygon):
+  __slots__ = ()
+
   def __init__(self, a, b, c, d):
     super().__init__(a, b, c, d)
 
 class Rectangle(Quadrilateral):
+  __slots__ = ()
+
   def __init__(self, a, b):
     super().__init__(a, b, a, b)
 
@@ -332,6 +512,8 @@ class Rectangle(Quadrilateral):
     return self._sides[0] * self._sides[1]
 
 class Square(Rectangle):
+  __slots__ = ()
+
   def __init__(self, l):
     super().__init__(l, l)
 
@@ -344,18 +526,26 @@ class Square(Rectangle):
     return self._sides[0] ** 2
 
 class Pentagon(NontriangularPolygon):
+  __slots__ = ()
+
   def __init__(self, a, b, c, d, e):
     super().__init__(a, b, c, d, e)
 
 class Hexagon(NontriangularPolygon):
+  __slots__ = ()
+
   def __init__(self, a, b, c, d, e, f):
     super().__init__(a, b, c, d, e, f)
 
 class Octagon(NontriangularPolygon):
+  __slots__ = ()
+
   def __init__(self, a, b, c, d, e, f, g, h):
     super().__init__(a, b, c, d, e, f, g, h)
 
 class RegularPentagon(NontriangularPolygon):
+  __slots__ = ()
+
   def __init__(self, l):
     super().__init__(*((l,) * 5))
   def perimeter(self):
@@ -366,6 +556,8 @@ class RegularPentagon(NontriangularPolygon):
     return 0.25 * (25 + 10 * 5 ** 0.5) ** 0.5 * self._sides[0] ** 2
 
 class RegularHexagon(NontriangularPolygon):
+  __slots__ = ()
+
   def __init__(self, l):
     super().__init__(*((l,) * 6))
   def perimeter(self):
@@ -376,6 +568,8 @@ class RegularHexagon(NontriangularPolygon):
     return 1.5 * 3 ** 0.5 * self._sides[0] ** 2
 
 class RegularOctagon(NontriangularPolygon):
+  __slots__ = ()
+
   def __init__(self, l):
     super().__init__(*((l,) * 8))
   def perimeter(self):
@@ -385,6 +579,55 @@ class RegularOctagon(NontriangularPolygon):
     """ Base class method is overridden for efficiency. """
     return 2 * (1 + 2 ** 0.5) * self._sides[0] ** 2
 
+class SimilarityIndex:
+  """ An index of polygons keyed by similarity signature (see similarity_signature).
+    Polygons are similar if their angles and side ratios differ by at most the tolerance of the index, as
+    tested by similar_pairs. Looking up a polygon probes the signatures that similar polygons may have (see
+    similarity_signatures), usually a single one, and tests the polygons found, so that it costs a few dict
+    lookups whatever the number of indexed polygons. A polygon with too many values near the boundaries of
+    cells is instead tested against every indexed polygon of the same vertex number.
+  """
+  def __init__(self, decimals=2, tolerance=1E-4, limit=8):
+    """ Initialize an empty index.
+      :param int decimals: the number of decimals kept by the cells of signatures.
+      :param float tolerance: the largest difference between equal angles (in radians) or side ratios.
+      :param int limit: the largest number of values near the boundaries of cells probed by a lookup.
+    """
+    assert 2 * tolerance < 10 ** -decimals, 'The tolerance should be less than half the width of a cell.'
+    self._decimals = decimals
+    self._tolerance = tolerance
+    self._limit = limit
+    self._polygons = {}
+    self._signatures = {} # vertex number -> signatures, for the lookups of polygons exceeding the limit
+    self._size = 0
+
+  def insert(self, polygons):
+    """ Insert polygons.
+      :param iterable polygons: triangles or polygons specified by vertex coordinate.
+    """
+    for polygon in polygons:
+      signature = polygon.signature(self._decimals)
+      self._polygons.setdefault(signature, []).append((self._size, polygon))
+      self._signatures.setdefault(len(signature), set()).add(signature)
+      self._size += 1
+
+  def lookup(self, polygon):
+    """ Return the indexed polygons similar to a polygon in the order of insertion. """
+    pairs = polygon._similarity_pairs()
+    signatures = similarity_signatures(pairs, self._decimals, self._tolerance, self._limit)
+    if signatures is None:
+      signatures = self._signatures.get(len(pairs), ())
+    candidates = sorted(
+      (entry for signature in signatures for entry in self._polygons.get(signature, ())), key=lambda entry: entry[0]
+    )
+    return [
+      candidate for order, candidate in candidates
+        if similar_pairs(pairs, candidate._similarity_pairs(), self._tolerance)
+    ]
+
+  def __len__(self):
+    return self._size
+
 def test():
   """ Test cases
   """
@@ -506,6 +749,164 @@ def test():
     polygon_anticlockwise_test
   )
 
+  print()
+
+  print('##########################')
+  print('Checking similarity index')
+  print('##########################')
+  index = SimilarityIndex()
+  index.insert(Pentagon(*generate_coordinates(5)) for i in range(3))
+  index.insert([original_triangle, Hexagon(*generate_coordinates(6))])
+  # a concave hexagon and its reflected, rotated, scaled and translated copy starting at another vertex
+  concave_coordinates = [(0, 0), (2, 0), (2, 1), (1, 1), (1, 3), (0, 3)]
+  concave_polygon = Hexagon(*concave_coordinates)
+  index.insert([concave_polygon])
+  transformed_coordinates = [(2 * y + 5, 2 * x - 1) for x, y in concave_coordinates]
+  transformed_polygon = Hexagon(*(transformed_coordinates[2:] + transformed_coordinates[:2]))
+  print('indexed polygons', len(index))
+  print('triangle lookup test', index.lookup(anticlockwise_rotated_triangle) == [original_triangle])
+  print('polygon lookup test', index.lookup(transformed_polygon) == [concave_polygon])
+  scaled_pentagon = Pentagon(*((3 * x, 3 * y) for x, y in generate_coordinates(5)))
+  print('regular polygon lookup test', len(index.lookup(scaled_pentagon)) == 3)
+  print('dissimilar polygon lookup test', index.lookup(Quadrilateral(*generate_coordinates(4))) == [])
+  # a rectangle 0.4% longer than the unit square shares its cell but is not similar
+  index.insert([Quadrilateral((0, 0), (1, 0), (1, 1), (0, 1))])
+  print('nearly similar polygon lookup test', index.lookup(Quadrilateral((0, 0), (1.004, 0), (1.004, 1), (0, 1))) == [])
+  # side ratios of 1 - 5E-7 and 1 + 5E-7 straddle the boundary of a cell
+  straddling = index.lookup(Quadrilateral((0, 0), (1.000001, 0), (1.000001, 1), (0, 1)))
+  print('straddling polygon lookup test', len(straddling) == 1 and straddling[0].area() == 1)
+  # rotated and translated congruent copies, whose keys may straddle the boundary of a cell
+  straddling_index, straddling_misses = SimilarityIndex(), 0
+  generator = np.random.RandomState(0)
+  for i in range(200):
+    # a convex polygon: points on a circle sorted by angle
+    radius = generator.uniform(0.5, 2.0)
+    vertexes = [cmath.rect(radius, angle) for angle in np.sort(generator.uniform(0, 2 * np.pi, 5))]
+    rotation = cmath.rect(1, generator.uniform(0, 2 * np.pi))
+    polygon = Pentagon(*((v.real, v.imag) for v in vertexes))
+    straddling_index.insert([polygon])
+    copy = Pentagon(*(((v * rotation).real + 100, (v * rotation).imag - 100) for v in vertexes))
+    straddling_misses += polygon not in straddling_index.lookup(copy)
+  print('rotated polygon lookup test', straddling_misses == 0)
+  print('signature bucket test', max(len(polygons) for polygons in straddling_index._polygons.values()) == 1)
+  print('transformed polygon similarity test', concave_polygon.similar_to(transformed_polygon))
+  # translated copies, whose coordinates are much larger than their sides
+  translated_misses = 0
+  for i in range(200):
+    # a convex polygon: points on a circle sorted by angle
+    radius = generator.uniform(0.5, 2.0)
+    vertexes = [cmath.rect(radius, angle) for angle in np.sort(generator.uniform(0, 2 * np.pi, 6))]
+    x, y = generator.uniform(-100, 100, 2)
+    polygon = Hexagon(*((v.real, v.imag) for v in vertexes))
+    translated_misses += not polygon.similar_to(Hexagon(*((v.real + x, v.imag + y) for v in vertexes)))
+  print('translated polygon similarity test', translated_misses == 0)
+  print('dissimilar polygon similarity test', not concave_polygon.similar_to(Hexagon(*generate_coordinates(6))))
+  # equality within tolerance is not transitive: no rotation of these pairs matches, though KMP would find one
+  print('intransitive tolerance test', not similar_pairs([(0, 2), (0, 1), (0, 0), (0, 3), (0, 3)], [(0, 0), (0, 0), (0, 2), (0, 3), (0, 0)], 1))
+  # random small sequences against every rotation in both orientations
+  brute_force_mismatches = 0
+  for i in range(2000):
+    n = generator.randint(1, 7)
+    pattern, pairs = (list(map(tuple, generator.randint(0, 4, (n, 2)).tolist())) for k in range(2))
+    expected = any(
+      all(abs(p - q) <= 1 for left, right in zip(pattern, sequence[offset:] + sequence[:offset]) for p, q in zip(left, right))
+        for sequence in (pairs, reflect_pairs(pairs)) for offset in range(n)
+    )
+    brute_force_mismatches += similar_pairs(pattern, pairs, 1) != expected
+  print('tolerance matching test', brute_force_mismatches == 0)
+
+  # a polygon of many vertexes and its reflected copy starting at another vertex
+  star_coordinates = [
+    ((1.0 + 0.5 * (i % 3 == 0)) * math.cos(2 * math.pi * i / 3000), (1.0 + 0.5 * (i % 3 == 0)) * math.sin(2 * math.pi * i / 3000))
+      for i in range(3000)
+  ]
+  star_polygon = NontriangularPolygon(*star_coordinates)
+  reflected_coordinates = [(x, -y) for x, y in star_coordinates[1000:] + star_coordinates[:1000]]
+  print('large polygon similarity test', star_polygon.similar_to(NontriangularPolygon(*reflected_coordinates)))
+
+  print()
+
+  print('##############################')
+  print('Checking cached derived values')
+  print('##############################')
+  square = Quadrilateral(*generate_coordinates(4))
+  print('cached area test', square.area() is square.area())
+  try:
+    square.vertexes[0][0] = 2.0
+    print('read-only vertexes test', False)
+  except ValueError:
+    print('read-only vertexes test', True)
+  square.vertexes = [(0, 0), (2, 0), (2, 2), (0, 2)]
+  print('invalidated cache test', square.area() == 4.0 and square.perimeter() == 8.0)
+
+  print()
+
+  print('###########################################')
+  print('Checking area calculation of large polygons')
+  print('###########################################')
+  N = 10 ** 6
+  print('{:<56}\t'.format('%d-gon (area calculated by formula)' % N), 0.5 * N * math.sin(2 * math.pi / N))
+  print('{:<56}\t'.format('%d-gon (area calculated by partition)' % N), partition_area(generate_coordinates(N)))
+
+FIELDS = ('line', 'shape', 'perimeter', 'area', 'error')
+
+def evaluate_lines(lines):
+  """ Evaluate the perimeter and area of shapes. Errors are reported per shape instead of raised.
+    :param list lines: (line number, line) pairs, a line specifying a shape like the command line arguments.
+  """
+  results = []
+  for number, line in lines:
+    args = line.split()
+    result = {'line': number, 'shape': args[0], 'perimeter': None, 'area': None, 'error': None}
+    try:
+      polygon = parse_polygon(*args)
+      result['perimeter'] = float(polygon.perimeter())
+      result['area'] = float(polygon.area())
+    except Exception as e:
+      result['error'] = '%s: %s' % (type(e).__name__, e) if str(e) else type(e).__name__
+    results.append(result)
+  return results
+
+def read_chunks(input_file, chunk_size):
+  """ Generate chunks of (line number, line) pairs from a file, skipping blank lines. """
+  import itertools
+  lines = ((number, line) for number, line in enumerate(input_file, 1) if line.strip())
+  while True:
+    chunk = list(itertools.islice(lines, chunk_size))
+    if not chunk:
+      return
+    yield chunk
+
+def bulk(input_file, output_file, output_format='csv', workers=None, chunk_size=1024):
+  """ Evaluate the shapes of a file chunk by chunk and stream the results.
+    :param file input_file: one shape per line.
+    :param file output_file: the file to which results are written.
+    :param str output_format: 'csv' or 'jsonl'.
+    :param int workers: the number of processes. Chunks are evaluated in this process if workers is 1.
+    :param int chunk_size: the number of lines per chunk.
+  """
+  import csv
+  import json
+  from multiprocessing import Pool
+
+  assert output_format in ('csv', 'jsonl'), 'Unsupported format.'
+  if output_format == 'csv':
+    writer = csv.DictWriter(output_file, FIELDS)
+    writer.writeheader()
+    write = writer.writerows
+  else:
+    write = lambda results: output_file.writelines(json.dumps(result) + '\n' for result in results)
+
+  chunks = read_chunks(input_file, chunk_size)
+  if workers == 1:
+    for results in map(evaluate_lines, chunks):
+      write(results)
+    return
+  with Pool(workers) as pool:
+    # imap keeps the order of chunks and only holds the chunks in flight
+    for results in pool.imap(evaluate_lines, chunks):
+      write(results)
+
 def main():
   """ Handles command line options. """
   import sys
@@ -513,7 +914,21 @@ def main():
     test()
 
   else:
-    if sys.argv[1] == 'similar':
+    if sys.argv[1] == 'bulk':
+      options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[2:] if arg.startswith('--'))
+      names = [arg for arg in sys.argv[2:] if not arg.startswith('--')]
+      name = names[0] if names else '-'
+      input_file = sys.stdin if name == '-' else open(name)
+      try:
+        bulk(
+          input_file, sys.stdout, options.get('format', 'csv'),
+          int(options['workers']) if 'workers' in options else None, int(options.get('chunk-size', 1024))
+        )
+      finally:
+        if input_file is not sys.stdin:
+          input_file.close()
+
+    elif sys.argv[1] == 'similar':
       # argv[1] must be a string specifying the shape
       index = 0
       for i, arg in enumerate(sys.argv[3:]):
@@ -0,0 +1,210 @@
+'''
+Benchmarks of hw03.Matrix.
+
+Command line usage:
+    python3 benchmark.py [suite] [--operations=construction,add,...] [--sizes=8,32,...] [--budget=SECONDS] [--output=NAME]
+      Time every operation of Matrix and of NumPy as a baseline on square matrixes of several sizes.
+      Report operations per second, the memory traced by tracemalloc in a separate call, and the scaling
+      exponent k of time ~ size ** k fitted over the sizes. The memory is reported as the blocks and bytes retained
+      by the result, and the temporary bytes, i.e. the peak memory during the call beyond the retained bytes.
+      (tracemalloc traces live blocks, so temporaries freed during the call are measured by the peak, not counted.) The results are also written as JSON (default: benchmark.json).
+      By default, sizes range from 8 to 2048, but the cubic operations (dot, det) stop at 256.
+      Every measurement repeats its operation until the budget (default: 0.2 s) is spent.
+    python3 benchmark.py crossover [--sizes=64,128,256,512] [--crossovers=32,64,128,256] [--repeat=N]
+      Time the strassen backend of Matrix.dot at several crossovers against the python backend,
+      to find the sizes at which Strassen's algorithm pays off.
+'''
+
+import json
+import math
+import platform
+import random
+import time
+import tracemalloc
+
+import numpy as np
+
+from hw03 import Matrix
+
+# name -> (create the operands from a size, the operation on matrixes, the operation on numpy.ndarray)
+OPERATIONS = {
+  'construction': (lambda size: [random_list(size)], Matrix, np.array),
+  'add': (lambda size: random_operands(size, 2), Matrix.__add__, lambda left, right: left + right),
+  'dot': (lambda size: random_operands(size, 2), Matrix.dot, lambda left, right: left.dot(right)),
+  'transpose': (lambda size: random_operands(size, 1), lambda matrix: matrix.transpose().copy(), lambda array: array.T.copy()),
+  # Matrix caches its LU decomposition, so every call computes the determinant of a fresh copy
+  'det': (lambda size: random_operands(size, 1), lambda matrix: matrix.copy().det(), np.linalg.det),
+}
+
+SIZES = (8, 32, 128, 512, 2048)
+CUBIC_SIZES = (8, 32, 128, 256)
+
+def random_list(row_count, column_count=None, seed=0):
+  """ Return a nested list of random floats.
+    :param int row_count, column_count: The shape. Square by default.
+    :param int seed: The random seed.
+  """
+  generator = random.Random(seed)
+  return [[generator.random() for j in range(column_count or row_count)] for i in range(row_count)]
+
+def random_matrix(row_count, column_count, seed=0):
+  """ Return a Matrix of random floats.
+    :param int row_count, column_count: The shape.
+    :param int seed: The random seed.
+  """
+  return Matrix(random_list(row_count, column_count, seed))
+
+def random_operands(size, count):
+  """ Return square nested lists of random floats, one per operand.
+    The suite converts them to matrixes or to numpy.ndarray instances.
+  """
+  return [random_list(size, size, seed) for seed in range(count)]
+
+def measure(function, arguments, budget):
+  """ Call a function repeatedly until the budget is spent and return the results as a dict.
+    :param callable function
+    :param list arguments
+    :param float budget: The time to spend in seconds. The function is called at least once.
+  """
+  calls, total = 0, 0.0
+  while calls == 0 or total < budget:
+    start = time.perf_counter()
+    function(*arguments)
+    total += time.perf_counter() - start
+    calls += 1
+
+  # memory is traced in a separate call since tracing slows down the operation
+  tracemalloc.start()
+  before = tracemalloc.take_snapshot()
+  tracemalloc.reset_peak()
+  start_memory = tracemalloc.get_traced_memory()[0]
+  result = function(*arguments)
+  current_memory, peak_memory = tracemalloc.get_traced_memory()
+  retained_bytes, peak_memory = current_memory - start_memory, peak_memory - start_memory
+  after = tracemalloc.take_snapshot()
+  tracemalloc.stop()
+  del result
+  # the snapshots themselves are allocated while tracing
+  exclude = [tracemalloc.Filter(False, tracemalloc.__file__)]
+  retained_blocks = sum(
+    statistic.count_diff for statistic in after.filter_traces(exclude).compare_to(before.filter_traces(exclude), 'lineno')
+      if statistic.count_diff > 0
+  )
+  return {
+    'seconds': total / calls,
+    'operations_per_second': calls / total if total else None,
+    'peak_memory_bytes': peak_memory,
+    'retained_blocks': retained_blocks,
+    'retained_bytes': retained_bytes,
+    'temporary_bytes': max(peak_memory - retained_bytes, 0),
+  }
+
+def exponent(sizes, seconds):
+  """ Return the slope k of the least-squares fit of log(seconds) = k * log(size) + c, or None for one size. """
+  if len(sizes) < 2:
+    return None
+  xs, ys = [math.log(size) for size in sizes], [math.log(value) for value in seconds]
+  x_mean, y_mean = sum(xs) / len(xs), sum(ys) / len(ys)
+  return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sum((x - x_mean) ** 2 for x in xs)
+
+def suite(operations, sizes=None, budget=0.2):
+  """ Benchmark operations of Matrix and of NumPy and return the results as a list of dicts.
+    :param list operations: The names of OPERATIONS.
+    :param list sizes: The sizes of square matrixes. By default SIZES, or CUBIC_SIZES for dot and det.
+    :param float budget: The time to spend per measurement in seconds.
+  """
+  results = []
+  for name in operations:
+    create, matrix_function, array_function = OPERATIONS[name]
+    operation_sizes = sizes or (CUBIC_SIZES if name in ('dot', 'det') else SIZES)
+    measurements = []
+    for size in operation_sizes:
+      operands = create(size)
+      if name == 'construction':
+        matrix_arguments = array_arguments = operands
+      else:
+        matrix_arguments = [Matrix(operand) for operand in operands]
+        array_arguments = [np.array(operand) for operand in operands]
+      matrix_result = measure(matrix_function, matrix_arguments, budget)
+      array_result = measure(array_function, array_arguments, budget)
+      measurements.append({'size': size, 'matrix': matrix_result, 'numpy': array_result})
+      print(
+        '{:<13} {:>5} {:>14.1f} ops/s {:>10} retained blocks {:>12} retained bytes {:>12} temporary bytes'
+        '  numpy {:>14.1f} ops/s  ratio {:>8.1f}'.format(
+          name, size, matrix_result['operations_per_second'], matrix_result['retained_blocks'],
+          matrix_result['retained_bytes'], matrix_result['temporary_bytes'], array_result['operations_per_second'],
+          matrix_result['seconds'] / array_result['seconds']
+        )
+      )
+    result = {
+      'operation': name,
+      'measurements': measurements,
+      'exponent': exponent(operation_sizes, [measurement['matrix']['seconds'] for measurement in measurements]),
+      'numpy_exponent': exponent(operation_sizes, [measurement['numpy']['seconds'] for measurement in measurements]),
+    }
+    results.append(result)
+    if result['exponent'] is not None:
+      print('{:<13} scaling exponent {:.2f}  numpy {:.2f}'.format(name, result['exponent'], result['numpy_exponent']))
+  return results
+
+def best_time(function, repeat):
+  """ Return the shortest time of several calls in seconds.
+    :param callable function: function()
+    :param int repeat: The number of calls.
+  """
+  times = []
+  for i in range(repeat):
+    start = time.perf_counter()
+    function()
+    times.append(time.perf_counter() - start)
+  return min(times)
+
+def crossover(sizes, crossovers, repeat=1):
+  """ Time square products by the python backend and by the strassen backend at every crossover.
+    Return one dict per size.
+    :param list sizes: The sizes of square matrixes.
+    :param list crossovers: The crossovers of the strassen backend.
+    :param int repeat: The number of timed calls per measurement.
+  """
+  results = []
+  for size in sizes:
+    left, right = random_matrix(size, size, 0), random_matrix(size, size, 1)
+    classical = best_time(lambda: left.dot(right), repeat)
+    strassen = {
+      value: best_time(lambda: left.dot(right, 'strassen', crossover=value), repeat)
+        for value in crossovers if value < size
+    }
+    results.append({'size': size, 'classical': classical, 'strassen': strassen})
+    print('size {:>5}  classical {:>9.4f} s'.format(size, classical))
+    for value, seconds in sorted(strassen.items()):
+      print('            crossover {:>5} {:>9.4f} s  speedup {:.2f}'.format(value, seconds, classical / seconds))
+  return results
+
+def main():
+  """ Main program. """
+  import sys
+
+  options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+  args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+  command = args[0] if args else 'suite'
+  repeat = int(options.get('repeat', 1))
+  if command == 'suite':
+    operations = options['operations'].split(',') if 'operations' in options else tuple(OPERATIONS)
+    sizes = [int(size) for size in options['sizes'].split(',')] if 'sizes' in options else None
+    results = suite(operations, sizes, float(options.get('budget', 0.2)))
+    with open(options.get('output', 'benchmark.json'), 'w') as output_file:
+      json.dump({
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+      }, output_file, indent=2)
+  elif command == 'crossover':
+    sizes = [int(size) for size in options.get('sizes', '64,128,256,512').split(',')]
+    crossovers = [int(value) for value in options.get('crossovers', '32,64,128,256').split(',')]
+    crossover(sizes, crossovers, repeat)
+  else:
+    raise ValueError('Unsupported command: %s' % command)
+
+if __name__ == '__main__':
+  main()
@@ -1,33 +1,233 @@
+from array import array
+from itertools import repeat
+import numbers
 import operator
+import struct
+import sys
+
+MAGIC = b'MTRX'
+HEADER = struct.Struct('<4sc3xQQ') # magic, typecode ('d' or 'q'), rows, columns; 24 bytes keep the values aligned
 
 class Matrix:
-  def __init__(self, matrix):
+  """ A matrix stored in one flat buffer.
+    Element (i, j) is _data[_offset + i * _row_stride + j * _column_stride].
+    Views (transpose, row, column, submatrix) share the buffer of their parent.
+    Every matrix sharing a buffer copies it before its first write (copy on write).
+  """
+  def __init__(self, matrix, storage='list', validate=True):
     """ Initializer.
       :param list matrix: A nested list.
+      :param str storage: 'list' stores any real values in a flat list.
+        'array' stores values as doubles in a flat array('d'), 8 bytes per value.
+      :param bool validate: Check the nested list. Only skip validation for trusted data.
     """
     assert isinstance(matrix, (list, tuple)), 'Matrix initializer only accepts nested list.'
-    assert all(isinstance(row, (list, tuple)) for row in matrix), \
-      'Matrix initializer only accepts nested list.'
-
     self._row_count = len(matrix)
     self._column_count = len(matrix[0])
-    assert all(len(row) == self._column_count for row in matrix), \
-      'Every list in the nested list must contain identical number of values.'
-    assert all(isinstance(value, (int, float)) for row in matrix for value in row), \
-      'Matrix only accepts integer or float values.'
 
-    self._matrix = [[] for i in range(len(matrix))]
-    for index, row in enumerate(self._matrix):
-      row.extend(matrix[index])
+    data = []
+    for row in matrix:
+      if validate:
+        assert isinstance(row, (list, tuple)), 'Matrix initializer only accepts nested list.'
+        assert len(row) == self._column_count, \
+          'Every list in the nested list must contain identical number of values.'
+      data.extend(row)
+    if validate:
+      # checking the exact type first is much faster than the abstract base class
+      assert all(type(value) in (int, float) or isinstance(value, numbers.Real) for value in data), \
+        'Matrix only accepts integer, float or fraction values.'
+
+    self._data = _storage(data, storage)
+    self._offset = 0
+    self._row_stride = self._column_count
+    self._column_stride = 1
+    self._shared = False # whether the buffer is shared with views
+    self._factorizations = {} # exact -> the LU decomposition computed by lu
+
+  @classmethod
+  def _from_buffer(cls, data, shape, strides=None, offset=0):
+    """ Create a matrix on a flat buffer without validation. Users should not call _from_buffer.
+      :param sequence data: The flat buffer, which is not copied.
+      :param tuple shape: (row, column).
+      :param tuple strides: (row stride, column stride). Row-major by default.
+      :param int offset: The index of element (0, 0) in data.
+    """
+    matrix = cls.__new__(cls)
+    matrix._data = data
+    matrix._row_count, matrix._column_count = shape
+    matrix._row_stride, matrix._column_stride = strides or (shape[1], 1)
+    matrix._offset = offset
+    matrix._shared = False
+    matrix._factorizations = {}
+    return matrix
+
+  def _view(self, shape, strides, offset):
+    """ Create a view sharing the buffer. Users should not call _view. """
+    self._shared = True
+    view = Matrix._from_buffer(self._data, shape, strides, offset)
+    view._shared = True
+    return view
+
+  def _row(self, index):
+    """ Return a row as a flat sequence. Users should not call _row. """
+    start = self._offset + index * self._row_stride
+    if self._column_stride == 1:
+      return self._data[start:start + self._column_count]
+    if self._column_stride == 0: # broadcast
+      return [self._data[start]] * self._column_count
+    return self._data[start:start + self._column_count * self._column_stride:self._column_stride]
+
+  def _column(self, index):
+    """ Return a column as a flat sequence. Users should not call _column. """
+    start = self._offset + index * self._column_stride
+    if self._row_stride == 0: # broadcast
+      return [self._data[start]] * self._row_count
+    return self._data[start:start + self._row_count * self._row_stride:self._row_stride]
+
+  def _rows(self):
+    """ Generate the rows as flat sequences. Users should not call _rows. """
+    return (self._row(index) for index in range(self._row_count))
+
+  def _values(self):
+    """ Return the values in row-major order. Users should not call _values. """
+    size = self._row_count * self._column_count
+    if (self._row_stride, self._column_stride) == (self._column_count, 1) and len(self._data) == size:
+      return self._data
+    return [value for row in self._rows() for value in row]
+
+  def _broadcast(self, shape):
+    """ Return the values in row-major order, broadcast to a shape. Users should not call _broadcast.
+      A dimension of size 1 is repeated along the same dimension of shape.
+    """
+    if self.shape == shape:
+      return self._values()
+    return (value for row in self._broadcast_rows(shape) for value in row)
+
+  def _broadcast_rows(self, shape):
+    """ Generate the rows broadcast to a shape. Only one row is held at a time: a 1 x n matrix yields its
+      only row repeatedly and an n x 1 matrix yields each value repeated along a row.
+      Users should not call _broadcast_rows.
+    """
+    assert all(size in (1, target) for size, target in zip(self.shape, shape)), 'Incompatible shapes.'
+    if self._column_count == shape[1]:
+      return self._rows() if self._row_count == shape[0] else repeat(self._row(0), shape[0])
+    column = self._column(0) if self._row_count == shape[0] else repeat(self._data[self._offset], shape[0])
+    return (repeat(value, shape[1]) for value in column)
+
+  def _assign_rows(self, rows):
+    """ Overwrite the values in place, one row at a time. Users should not call _assign_rows.
+      :param iterable rows: One iterable of values per row. Row i may be computed from row i of self.
+    """
+    if self._shared:
+      self._materialize()
+    kind = _kind(self._data)
+    for index, row in enumerate(rows):
+      start = self._offset + index * self._row_stride
+      stop = start + self._column_count * self._column_stride
+      self._data[start:stop:self._column_stride] = array('d', row) if kind == 'array' else list(row)
+    self._factorizations = {}
+
+  def _new(self, data, shape):
+    """ Create a row-major matrix of the same storage from row-major values. Users should not call _new. """
+    if _kind(self._data) == 'array':
+      data = array('d', data)
+    elif not isinstance(data, list):
+      data = list(data)
+    return Matrix._from_buffer(data, shape)
+
+  def __getitem__(self, index):
+    """ Return element matrix[i, j], or a view if i or j is a slice. """
+    row_index, column_index = index
+    if isinstance(row_index, slice) or isinstance(column_index, slice):
+      if not isinstance(row_index, slice):
+        row_index = _normalize(row_index, self._row_count, 'Row')
+        row_index = slice(row_index, row_index + 1)
+      if not isinstance(column_index, slice):
+        column_index = _normalize(column_index, self._column_count, 'Column')
+        column_index = slice(column_index, column_index + 1)
+      return self.submatrix(row_index, column_index)
+    return self._data[self._index(row_index, column_index)]
+
+  def __setitem__(self, index, value):
+    """ Assign element matrix[i, j]. A shared buffer is copied first. """
+    assert isinstance(value, numbers.Real), 'Matrix only accepts integer, float or fraction values.'
+    if self._shared:
+      self._materialize()
+    self._data[self._index(*index)] = value
+    self._factorizations = {}
+
+  def _index(self, row_index, column_index):
+    """ Return the index of element (i, j) in the buffer. Users should not call _index. """
+    return self._offset + _normalize(row_index, self._row_count, 'Row') * self._row_stride + \
+      _normalize(column_index, self._column_count, 'Column') * self._column_stride
+
+  def _materialize(self):
+    """ Copy the values to a private row-major buffer. Users should not call _materialize. """
+    self._data = self._new(iter(self._values()), self.shape)._data
+    self._offset = 0
+    self._row_stride, self._column_stride = self._column_count, 1
+    self._shared = False
 
   def __str__(self):
     """ Convert Matrix instance to string. """
-    string = ''
-    for row in self._matrix:
-      for value in row:
-        string += '{} '.format(value)
-      string += '\n'
-    return string
+    return ''.join(self._lines())
+
+  def _lines(self):
+    """ Generate the rows as lines of text, values separated by spaces. Users should not call _lines. """
+    for row in self._rows():
+      yield ' '.join(map(str, row)) + ' \n'
+
+  def write(self, file):
+    """ Write the matrix as text in the format of __str__, one row at a time.
+      :param file: A text file.
+    """
+    file.writelines(self._lines())
+
+  def save(self, name):
+    """ Save the matrix to a binary file: HEADER followed by the values in row-major order.
+      Integer values are stored as 64-bit integers ('q'); any other values are stored as doubles ('d').
+      :param str name: The name of file.
+    """
+    typecode = 'd' if _kind(self._data) == 'array' else 'q'
+    if typecode == 'q':
+      try:
+        for row in self._rows():
+          array('q', row)
+      except (TypeError, OverflowError):
+        typecode = 'd'
+    with open(name, 'wb') as file:
+      file.write(HEADER.pack(MAGIC, typecode.encode(), self._row_count, self._column_count))
+      for row in self._rows():
+        values = array(typecode, row)
+        if sys.byteorder == 'big':
+          values.byteswap()
+        values.tofile(file)
+
+  @classmethod
+  def load(cls, name, mmap=True):
+    """ Load a matrix saved by save.
+      :param str name: The name of file.
+      :param bool mmap: Map the file to memory instead of reading it. The values are not parsed or copied:
+        the buffer of the matrix is a memoryview of the file, which is copied before the first write.
+    """
+    with open(name, 'rb') as file:
+      magic, typecode, row_count, column_count = HEADER.unpack(file.read(HEADER.size))
+      assert magic == MAGIC, 'Not a matrix file.'
+      typecode = typecode.decode()
+      assert typecode in ('d', 'q'), 'Unsupported typecode.'
+      shape = row_count, column_count
+      if mmap and sys.byteorder == 'little':
+        import mmap as mmap_module
+        buffer = mmap_module.mmap(file.fileno(), 0, access=mmap_module.ACCESS_READ)
+        data = memoryview(buffer)[HEADER.size:HEADER.size + row_count * column_count * 8].cast(typecode)
+        matrix = cls._from_buffer(data, shape)
+        matrix._shared = True # the buffer is read only
+        return matrix
+      data = array(typecode)
+      data.fromfile(file, row_count * column_count)
+    if sys.byteorder == 'big':
+      data.byteswap()
+    return cls._from_buffer(data if typecode == 'd' else data.tolist(), shape)
   
   def __add__(self, matrix):
     """ Override + operator. """
@@ -45,46 +245,158 @@ class Matrix:
     """ Override / operator. """
     return self._elementwise(matrix, operator.truediv)
 
-  def det(self):
-    """ Compute the determinant. """
+  def __radd__(self, scalar):
+    """ Override + operator with a scalar on the left. """
+    return self._elementwise(scalar, operator.add, reflected=True)
+
+  def __rsub__(self, scalar):
+    """ Override - operator with a scalar on the left. """
+    return self._elementwise(scalar, operator.sub, reflected=True)
+
+  def __rmul__(self, scalar):
+    """ Override * operator with a scalar on the left. """
+    return self._elementwise(scalar, operator.mul, reflected=True)
+
+  def __rtruediv__(self, scalar):
+    """ Override / operator with a scalar on the left. """
+    return self._elementwise(scalar, operator.truediv, reflected=True)
+
+  def __iadd__(self, matrix):
+    """ Override += operator. The values are updated in place. """
+    return self._elementwise(matrix, operator.add, in_place=True)
+
+  def __isub__(self, matrix):
+    """ Override -= operator. The values are updated in place. """
+    return self._elementwise(matrix, operator.sub, in_place=True)
+
+  def __imul__(self, matrix):
+    """ Override *= operator. The values are updated in place. """
+    return self._elementwise(matrix, operator.mul, in_place=True)
+
+  def __itruediv__(self, matrix):
+    """ Override /= operator. The values are updated in place. """
+    return self._elementwise(matrix, operator.truediv, in_place=True)
+
+  def det(self, exact=False):
+    """ Compute the determinant by LU decomposition in O(n^3).
+      :param bool exact: Compute with fractions.Fraction, so that the determinant of an integer matrix is an exact integer.
+    """
     if self.shape == (1, 1):
-      return self._matrix[0][0]
+      return self._data[self._offset]
     assert self._row_count == self._column_count, 'Determinant is only available for square matrix.'
-    if self._row_count == 2:
-      return self._matrix[0][0] * self._matrix[1][1] - self._matrix[0][1] * self._matrix[1][0]
-    result = 0
-    for index, value in enumerate(self._matrix[0]):
-      coefficient = (-1) ** index * value
-      minor = Matrix([row[:index] + row[index + 1:] for row in self._matrix[1:]]) # find the minor matrix
-      result += coefficient * minor.det()
+    permutation, factors, sign = self.lu(exact)
+    result = sign
+    for index, row in enumerate(factors):
+      result *= row[index]
+    if exact and result.denominator == 1:
+      return int(result)
     return result
 
-  def dot(self, matrix):
+  def lu(self, exact=False):
+    """ Compute the LU decomposition with partial pivoting, i.e. P * A = L * U.
+      Return (permutation, factors, sign), where row i of P * A is row permutation[i] of A,
+      factors holds L below the diagonal (the diagonal of L is 1) and U on and above the diagonal,
+      and sign is the determinant of P. The decomposition is computed once and reused by det, solve and inverse.
+      :param bool exact: Compute with fractions.Fraction instead of float.
+    """
+    assert self._row_count == self._column_count, 'LU decomposition is only available for square matrix.'
+    if exact not in self._factorizations:
+      self._factorizations[exact] = _lu(self._rows(), exact)
+    return self._factorizations[exact]
+
+  def solve(self, matrix, exact=False):
+    """ Solve the linear system self.dot(X) == matrix.
+      :param Matrix matrix: The right-hand side, one column per system. A SparseMatrix is converted to a Matrix.
+      :param bool exact: Compute with fractions.Fraction instead of float.
+    """
+    if hasattr(matrix, 'to_matrix'):
+      matrix = matrix.to_matrix() # e.g. SparseMatrix
+    assert isinstance(matrix, Matrix), 'Operands must be Matrix instances.'
+    assert self._column_count == matrix._row_count, 'The shapes of operands are not compatible.'
+    permutation, factors, sign = self.lu(exact)
+    assert all(row[index] != 0 for index, row in enumerate(factors)), 'Matrix is singular.'
+    if exact:
+      from fractions import Fraction
+      result = [[Fraction(value) for value in matrix._row(index)] for index in permutation]
+    else:
+      result = [list(matrix._row(index)) for index in permutation]
+    # forward substitution L * Y = P * B
+    for index, row in enumerate(factors):
+      for k in range(index):
+        if row[k]:
+          result[index] = [value - row[k] * y for value, y in zip(result[index], result[k])]
+    # backward substitution U * X = Y
+    for index in reversed(range(len(factors))):
+      row = factors[index]
+      for k in range(index + 1, len(factors)):
+        if row[k]:
+          result[index] = [value - row[k] * x for value, x in zip(result[index], result[k])]
+      result[index] = [value / row[index] for value in result[index]]
+    return Matrix._from_buffer([value for row in result for value in row], matrix.shape)
+
+  def inverse(self, exact=False):
+    """ Compute the inverse matrix.
+      :param bool exact: Compute with fractions.Fraction instead of float.
+    """
+    identity = [int(i == j) for i in range(self._row_count) for j in range(self._row_count)]
+    return self.solve(Matrix._from_buffer(identity, self.shape), exact)
+
+  def dot(self, matrix, backend='python', block_size=64, workers=None, crossover=128):
     """ Compute the dot product of matrixes.
-      :param Matrix matrix
+      :param Matrix matrix: A matrix, or an operand defining _rdot(matrix) (SparseMatrix), which computes the product.
+      :param str backend: 'python', 'strassen' or 'numpy'. The numpy backend requires NumPy.
+      :param int block_size: The size of tiles of the python backend.
+      :param int workers: Compute blocks of rows on this number of processes (python backend only). See parallel.py.
+        Only float matrixes are multiplied in parallel, since the workers compute in doubles; the other
+        matrixes are multiplied serially, so that the result is always identical to the serial result.
+      :param int crossover: The size below which the strassen backend switches to the python backend.
     """
+    if hasattr(matrix, '_rdot'):
+      return matrix._rdot(self) # e.g. SparseMatrix
     assert isinstance(matrix, Matrix), 'Operands must be Matrix instances.'
-    assert len(self._matrix[0]) == len(matrix._matrix), 'The shapes of operands are not compatible.'
-    result = [[] for i in range(self._row_count)]
-    for row_index, row in enumerate(result):
-      for column in matrix.transpose()._matrix:
-        dot_product = _dot_product(self._matrix[row_index], column) # the dot product of row and column
-        row.append(dot_product)
-    return Matrix(result)
+    assert self._column_count == matrix._row_count, 'The shapes of operands are not compatible.'
+    shape = self._row_count, matrix._column_count
+    if backend == 'numpy':
+      import numpy as np
+      return self._new(np.dot(np.array(self.to_list()), np.array(matrix.to_list())).ravel().tolist(), shape)
+    if backend == 'strassen':
+      assert crossover >= 1, 'The crossover must be at least 1.'
+      rows = _strassen(list(map(list, self._rows())), list(map(list, matrix._rows())), crossover, block_size)
+      return self._new([value for row in rows for value in row], shape)
+    assert backend == 'python', 'Unsupported backend.'
+    columns = [matrix._column(index) for index in range(matrix._column_count)] # transpose once
+    if workers and self._is_float() and matrix._is_float():
+      from parallel import parallel_dot
+      return self._new(parallel_dot(list(self._rows()), columns, workers, block_size), shape)
+    return self._new(_blocked_dot(list(self._rows()), columns, block_size), shape)
   
-  def _elementwise(self, matrix, operator):
+  def _elementwise(self, matrix, operator, reflected=False, in_place=False):
     """ Implementation of elementwise operations. Users should not call _elementwise.
-      :param Matrix matrix
+      Operands are broadcast like NumPy: a scalar applies to every value, a 1 x n matrix to every row
+      and an n x 1 matrix to every column.
+      :param Matrix / int / float matrix
       :param callable operator: operator(left, right)
+      :param bool reflected: Compute operator(matrix, self) instead.
+      :param bool in_place: Write the result to self. The result must be of the shape of self.
     """
-    assert isinstance(matrix, Matrix), 'Operands must be Matrix instances.'
-    assert self.shape == matrix.shape, 'Incompatible shapes.'
-    result = [[] for i in range(len(self._matrix))]
-    for row_index, row in enumerate(self._matrix):
-      for column_index, value in enumerate(row):
-        value = operator(value, matrix._matrix[row_index][column_index])
-        result[row_index].append(value)
-    return Matrix(result)
+    if not isinstance(matrix, (Matrix, numbers.Real)):
+      return NotImplemented # let the reflected operator of the operand, e.g. of Expression, handle it
+    shape = _broadcast_shape(self, matrix)
+    if in_place:
+      assert shape == self.shape, 'The result cannot be written in place.'
+      if self._shared:
+        self._materialize() # before reading rows, so that an operand sharing the buffer keeps its values
+      self._assign_rows(
+        map(operator, left, right) for left, right in zip(self._rows(), _broadcast_rows(matrix, shape))
+      )
+      return self
+    left, right = _broadcast_values(self, shape), _broadcast_values(matrix, shape)
+    values = map(operator, right, left) if reflected else map(operator, left, right)
+    return self._new(values, shape)
+
+  def _is_float(self):
+    """ Test whether every value is a float, e.g. for array storage. Users should not call _is_float. """
+    return _kind(self._data) == 'array' or all(type(value) is float for row in self._rows() for value in row)
 
   @property
   def shape(self):
@@ -93,14 +405,188 @@ class Matrix:
 
   def to_list(self):
     """ Convert the matrix to a (nested) list. """
-    matrix = [[] for i in range(self._row_count)]
-    for index, row in enumerate(matrix):
-      row.extend(self._matrix[index])
-    return matrix
+    return [list(row) for row in self._rows()]
 
   def transpose(self):
-    """ Return a transposed matrix. """
-    return Matrix(list(zip(*self._matrix)))
+    """ Return a transposed view. """
+    return self._view(
+      (self._column_count, self._row_count), (self._column_stride, self._row_stride), self._offset
+    )
+
+  def submatrix(self, rows, columns):
+    """ Return a view of the rows and columns selected by slices.
+      :param slice rows
+      :param slice columns
+    """
+    row_start, row_stop, row_step = rows.indices(self._row_count)
+    column_start, column_stop, column_step = columns.indices(self._column_count)
+    assert row_step > 0 and column_step > 0, 'Only positive steps are supported.'
+    shape = len(range(row_start, row_stop, row_step)), len(range(column_start, column_stop, column_step))
+    assert all(shape), 'Empty submatrix.'
+    strides = self._row_stride * row_step, self._column_stride * column_step
+    return self._view(shape, strides, self._offset + row_start * self._row_stride + column_start * self._column_stride)
+
+  def row(self, index):
+    """ Return a view of a row as a 1 x n matrix. """
+    return self[index, :]
+
+  def column(self, index):
+    """ Return a view of a column as an n x 1 matrix. """
+    return self[:, index]
+
+  def lazy(self):
+    """ Return an expression of this matrix, on which + - * / build an expression tree
+      instead of computing intermediate matrixes. See Expression.
+    """
+    return Expression(None, self)
+
+  def copy(self):
+    """ Return a row-major copy that shares nothing with this matrix. """
+    return self._new(iter(self._values()), self.shape)
+
+class Expression:
+  """ A lazily evaluated elementwise expression of matrixes, e.g. (A.lazy() + B) * C - D.
+    Operands are broadcast like the operators of Matrix. Operators only build the expression tree. The tree is evaluated in one fused pass over
+    the values of its matrixes when the result is needed: by evaluate, to_list, str, det,
+    indexing or any other method of Matrix. The result is computed once and cached.
+  """
+  def __init__(self, symbol, left, right=None):
+    """ Initializer.
+      :param str symbol: '+', '-', '*', '/', or None for a leaf.
+      :param Matrix / Expression / int / float left: The left operand, or the matrix or scalar of a leaf.
+      :param Expression right: The right operand.
+    """
+    self._symbol = symbol
+    self._left = left
+    self._right = right
+    if symbol is None:
+      self._shape = (1, 1) if isinstance(left, numbers.Real) else left.shape
+    else:
+      self._shape = _broadcast_shape(left, right)
+    self._result = None
+
+  @property
+  def shape(self):
+    """ Return the shape of the result without evaluation. """
+    return self._shape
+
+  def _operand(self, operand):
+    """ Convert an operand to an expression. """
+    if isinstance(operand, (Matrix, numbers.Real)):
+      return Expression(None, operand)
+    assert isinstance(operand, Expression), 'Operands must be Matrix or Expression instances or scalars.'
+    return operand
+
+  def __add__(self, operand):
+    return Expression('+', self, self._operand(operand))
+
+  def __sub__(self, operand):
+    return Expression('-', self, self._operand(operand))
+
+  def __mul__(self, operand):
+    return Expression('*', self, self._operand(operand))
+
+  def __truediv__(self, operand):
+    return Expression('/', self, self._operand(operand))
+
+  def __radd__(self, operand):
+    return Expression('+', self._operand(operand), self)
+
+  def __rsub__(self, operand):
+    return Expression('-', self._operand(operand), self)
+
+  def __rmul__(self, operand):
+    return Expression('*', self._operand(operand), self)
+
+  def __rtruediv__(self, operand):
+    return Expression('/', self._operand(operand), self)
+
+  def _source(self, leaves):
+    """ Return the Python source of the expression and collect its distinct matrixes in leaves. """
+    if self._symbol is None:
+      for index, leaf in enumerate(leaves):
+        if leaf is self._left:
+          return 'x%d' % index
+      leaves.append(self._left)
+      return 'x%d' % (len(leaves) - 1)
+    return '(%s %s %s)' % (self._left._source(leaves), self._symbol, self._right._source(leaves))
+
+  def evaluate(self):
+    """ Evaluate the expression in one pass and return the resulting Matrix. """
+    if self._result is None:
+      leaves = []
+      source = self._source(leaves)
+      # the source only consists of operator symbols and argument names, so it is safe to compile
+      function = eval('lambda %s: %s' % (', '.join('x%d' % i for i in range(len(leaves))), source))
+      values = map(function, *(_broadcast_values(leaf, self.shape) for leaf in leaves))
+      matrix = next(leaf for leaf in leaves if isinstance(leaf, Matrix))
+      self._result = matrix._new(values, self.shape)
+    return self._result
+
+  def __str__(self):
+    return str(self.evaluate())
+
+  def __getitem__(self, index):
+    return self.evaluate()[index]
+
+  def __getattr__(self, name):
+    """ Delegate the other methods of Matrix to the result. """
+    if name.startswith('_'):
+      raise AttributeError(name)
+    return getattr(self.evaluate(), name)
+
+def _broadcast_shape(*operands):
+  """ Return the shape to which matrixes and scalars broadcast. Helper function for Matrix._elementwise.
+    :param Matrix / Expression / int / float operands
+    Users should not call _broadcast_shape.
+  """
+  shapes = [operand.shape for operand in operands if not isinstance(operand, numbers.Real)]
+  shape = tuple(max(sizes) for sizes in zip(*shapes))
+  assert all(size in (1, target) for other in shapes for size, target in zip(other, shape)), \
+    'Incompatible shapes.'
+  return shape
+
+def _broadcast_values(operand, shape):
+  """ Return the values of a matrix or scalar broadcast to a shape in row-major order.
+    Helper function for Matrix._elementwise. Users should not call _broadcast_values.
+  """
+  if isinstance(operand, numbers.Real):
+    return repeat(operand, shape[0] * shape[1])
+  return operand._broadcast(shape)
+
+def _broadcast_rows(operand, shape):
+  """ Generate the rows of a matrix or scalar broadcast to a shape. See Matrix._broadcast_rows.
+    Helper function for Matrix._elementwise. Users should not call _broadcast_rows.
+  """
+  if isinstance(operand, numbers.Real):
+    return repeat(repeat(operand), shape[0]) # map stops at the end of the other row
+  return operand._broadcast_rows(shape)
+
+def _normalize(index, count, name):
+  """ Return a possibly negative index as an index in [0, count). Users should not call _normalize.
+    :param int index
+    :param int count: The number of rows or columns.
+    :param str name: 'Row' or 'Column', for the error message.
+  """
+  assert -count <= index < count, '%s index out of range.' % name
+  return index % count
+
+def _kind(data):
+  """ Return the storage of a flat buffer. A memoryview of doubles (see Matrix.load) counts as an array.
+    Users should not call _kind.
+  """
+  if isinstance(data, memoryview):
+    return 'array' if data.format == 'd' else 'list'
+  return 'array' if isinstance(data, array) else 'list'
+
+def _storage(values, storage):
+  """ Create a flat buffer of a storage type. Helper function for Matrix.__init__.
+    :param list values: The values in row-major order.
+    :param str storage: 'list' or 'array'.
+    Users should not call _storage.
+  """
+  assert storage in ('list', 'array'), 'Unsupported storage.'
+  return values if storage == 'list' else array('d', values)
 
 def _dot_product(left, right):
   """ Compute the dot product of vectors. Helper function for Matrix.dot.
@@ -108,7 +594,109 @@ def _dot_product(left, right):
     :param iterable right: Vector.
     Users should not call _dot_product.
   """
-  return sum(l * r for l, r in zip(left, right))
+  return sum(map(operator.mul, left, right))
+
+def _blocked_dot(rows, columns, block_size):
+  """ Multiply matrixes tile by tile, so that a tile of columns is reused by a tile of rows while it is cached.
+    Every value is summed in the same order as _dot_product, so the result does not depend on block_size.
+    Return the result as a flat row-major list.
+    Helper function for Matrix.dot. Users should not call _blocked_dot.
+    :param list rows: The rows of the left operand.
+    :param list columns: The columns of the right operand.
+    :param int block_size: The number of rows and columns per tile.
+  """
+  column_count = len(columns)
+  result = [0] * (len(rows) * column_count) # row-major
+  for row_start in range(0, len(rows), block_size):
+    row_tile = range(row_start, min(row_start + block_size, len(rows)))
+    for column_start in range(0, column_count, block_size):
+      column_tile = columns[column_start:column_start + block_size]
+      for row_index in row_tile:
+        row = rows[row_index]
+        start = row_index * column_count + column_start
+        result[start:start + len(column_tile)] = [
+          _dot_product(row, column) for column in column_tile
+        ]
+  return result
+
+def _add(left, right):
+  """ Add matrixes given as lists of rows. Helper function for _strassen. Users should not call _add. """
+  return [list(map(operator.add, l, r)) for l, r in zip(left, right)]
+
+def _sub(left, right):
+  """ Subtract matrixes given as lists of rows. Helper function for _strassen. Users should not call _sub. """
+  return [list(map(operator.sub, l, r)) for l, r in zip(left, right)]
+
+def _strassen(left, right, crossover, block_size):
+  """ Multiply matrixes given as lists of rows by Strassen's algorithm, with 7 instead of 8 recursive products.
+    Operands are padded with zeros to a common even size at every level, and the padding is cut from the result.
+    Products of size crossover or less are computed by _blocked_dot.
+    Helper function for Matrix.dot. Users should not call _strassen.
+    :param list left: The rows of the left operand.
+    :param list right: The rows of the right operand.
+    :param int crossover: The size at or below which _blocked_dot is used.
+    :param int block_size: The size of tiles of _blocked_dot.
+  """
+  row_count, inner, column_count = len(left), len(right), len(right[0])
+  size = max(row_count, inner, column_count)
+  if size <= max(crossover, 1): # a 1 x 1 block would be padded and split into 1 x 1 blocks forever
+    result = _blocked_dot(left, list(zip(*right)), block_size)
+    return [result[index * column_count:(index + 1) * column_count] for index in range(row_count)]
+
+  size += size % 2
+  half = size // 2
+  left = [row + [0] * (size - inner) for row in left] + [[0] * size] * (size - row_count)
+  right = [row + [0] * (size - column_count) for row in right] + [[0] * size] * (size - inner)
+  a11, a12 = [row[:half] for row in left[:half]], [row[half:] for row in left[:half]]
+  a21, a22 = [row[:half] for row in left[half:]], [row[half:] for row in left[half:]]
+  b11, b12 = [row[:half] for row in right[:half]], [row[half:] for row in right[:half]]
+  b21, b22 = [row[:half] for row in right[half:]], [row[half:] for row in right[half:]]
+
+  m1 = _strassen(_add(a11, a22), _add(b11, b22), crossover, block_size)
+  m2 = _strassen(_add(a21, a22), b11, crossover, block_size)
+  m3 = _strassen(a11, _sub(b12, b22), crossover, block_size)
+  m4 = _strassen(a22, _sub(b21, b11), crossover, block_size)
+  m5 = _strassen(_add(a11, a12), b22, crossover, block_size)
+  m6 = _strassen(_sub(a21, a11), _add(b11, b12), crossover, block_size)
+  m7 = _strassen(_sub(a12, a22), _add(b21, b22), crossover, block_size)
+
+  c11 = _add(_sub(_add(m1, m4), m5), m7)
+  c12 = _add(m3, m5)
+  c21 = _add(m2, m4)
+  c22 = _add(_add(_sub(m1, m2), m3), m6)
+  rows = [l + r for l, r in zip(c11, c12)] + [l + r for l, r in zip(c21, c22)]
+  return [row[:column_count] for row in rows[:row_count]]
+
+def _lu(matrix, exact):
+  """ Compute the LU decomposition with partial pivoting. Helper function for Matrix.lu.
+    :param iterable matrix: The rows of a square matrix.
+    :param bool exact: Compute with fractions.Fraction instead of float.
+    Users should not call _lu.
+  """
+  if exact:
+    from fractions import Fraction
+    factors = [[Fraction(value) for value in row] for row in matrix]
+  else:
+    factors = [[float(value) for value in row] for row in matrix]
+  size = len(factors)
+  permutation = list(range(size))
+  sign = 1
+  for k in range(size):
+    pivot_index = max(range(k, size), key=lambda i: abs(factors[i][k]))
+    if factors[pivot_index][k] == 0:
+      continue # the matrix is singular; the column is already eliminated
+    if pivot_index != k:
+      factors[k], factors[pivot_index] = factors[pivot_index], factors[k]
+      permutation[k], permutation[pivot_index] = permutation[pivot_index], permutation[k]
+      sign = -sign
+    pivot_row = factors[k]
+    pivot = pivot_row[k]
+    for row in factors[k + 1:]:
+      if row[k]:
+        multiplier = row[k] / pivot
+        row[k] = multiplier
+        row[k + 1:] = [value - multiplier * p for value, p in zip(row[k + 1:], pivot_row[k + 1:])]
+  return permutation, factors, sign
 
 def _test_equal(array, matrix, accuracy=1E-4):
   """ Test the equality of numpy.ndarray instance and Matrix instance. Only for the purpose of unit test. Users should not call _test_equal.
@@ -126,6 +714,7 @@ def _test():
     Users should not call _test.
   """
   # initialization
+  print('Test array storage', Matrix([[1, 2], [3, 4]], storage='array').to_list() == [[1.0, 2.0], [3.0, 4.0]])
   matrix_list = [[1] * 3, [2] * 3, [3] * 3]
   matrix = Matrix(matrix_list)
   print('matrix')
@@ -149,6 +738,20 @@ def _test():
   print('Test * operation', _test_equal(left_array * right_array, left_matrix * right_matrix))
   print('Test / operation', _test_equal(left_array / right_array, left_matrix / right_matrix))
 
+  # scalars, broadcasting and in-place operators
+  row_array, column_array = np.random.random((1, shape[1])), np.random.random((shape[0], 1))
+  row_matrix, column_matrix = Matrix(row_array.tolist()), Matrix(column_array.tolist())
+  print('Test broadcasting',
+    _test_equal(2 * left_array - row_array / column_array, 2 * left_matrix - row_matrix / column_matrix),
+    _test_equal(1 - (left_array + row_array), 1 - (left_matrix.lazy() + row_matrix)))
+  left_matrix += right_matrix
+  left_matrix *= row_matrix
+  left_matrix /= 2
+  square_matrix = Matrix([[1, 2], [3, 4]])
+  square_matrix += square_matrix.transpose() # the operand shares the buffer
+  print('Test in-place operators', _test_equal((left_array + right_array) * row_array / 2, left_matrix),
+    square_matrix.to_list() == [[2, 5], [5, 8]])
+
   # dot product
   left_shape = (4, 2)
   right_shape = (2, 4)
@@ -161,6 +764,29 @@ def _test():
   result_matrix = left_matrix.dot(right_matrix)
   
   print('Test dot product', _test_equal(result_array, result_matrix))
+  print('Test dot product (block size 1)', _test_equal(result_array, left_matrix.dot(right_matrix, block_size=1)))
+  print('Test dot product (numpy backend)', _test_equal(result_array, left_matrix.dot(right_matrix, 'numpy')))
+  print('Test dot product (strassen backend)',
+    _test_equal(result_array, left_matrix.dot(right_matrix, 'strassen', crossover=1)))
+  big_matrix = Matrix([[2 ** 60, 1], [1, 1]])
+  print('Test dot product (2 workers)', left_matrix.dot(right_matrix, workers=2).to_list() == result_matrix.to_list(),
+    str(big_matrix.dot(big_matrix, workers=2)) == str(big_matrix.dot(big_matrix)))
+
+  # lazy expression
+  arrays = [np.random.random(shape) for i in range(4)]
+  matrixes = [Matrix(array.tolist()) for array in arrays]
+  expression = (matrixes[0].lazy() + matrixes[1]) * matrixes[2] - matrixes[3] / matrixes[0]
+  print('Test lazy expression',
+    _test_equal((arrays[0] + arrays[1]) * arrays[2] - arrays[3] / arrays[0], expression))
+
+  # views
+  array = np.random.random((5, 7))
+  matrix = Matrix(array.tolist())
+  view = matrix.transpose()[1:4, ::2]
+  print('Test views', _test_equal(array.T[1:4, ::2], view), _test_equal(array[2:3, :], matrix.row(2)),
+    _test_equal(array[-1:, :], matrix.row(-1)), _test_equal(array[:, -2:-1], matrix.column(-2)))
+  view[0, 0] = 1024.0
+  print('Test copy on write', view[0, 0] == 1024.0 and matrix[0, 1] == array[0, 1])
 
   # determinant
   import numpy.linalg as la
@@ -172,5 +798,29 @@ def _test():
   matrix_det = round(matrix.det(), accuracy)
   print('Test determinant', array_det == matrix_det)
 
+  integer_list = [[3, 8, 1], [4, 6, -2], [7, -5, 9]]
+  print('Test exact determinant', Matrix(integer_list).det(exact=True) == -330)
+
+  # linear systems
+  right_array = np.random.random((N, 2))
+  print('Test solve', _test_equal(la.solve(array, right_array), matrix.solve(Matrix(right_array.tolist()))))
+  print('Test inverse', _test_equal(la.inv(array), matrix.inverse()))
+  # serialization
+  import os
+  import tempfile
+  name = os.path.join(tempfile.mkdtemp(), 'matrix.bin')
+  for value in (array, integer_list):
+    matrix = Matrix(value.tolist() if isinstance(value, np.ndarray) else value)
+    matrix.save(name)
+    loaded, read = Matrix.load(name), Matrix.load(name, mmap=False)
+    print('Test serialization', loaded.to_list() == read.to_list() == matrix.to_list() and str(loaded) == str(matrix))
+  loaded[0, 0] = 0
+  print('Test writing a mapped matrix', loaded[0, 0] == 0 and Matrix.load(name)[0, 0] == integer_list[0][0])
+  os.remove(name)
+  os.rmdir(os.path.dirname(name))
+
+  print('Test exact inverse', Matrix(integer_list).inverse(exact=True).dot(Matrix(integer_list)).to_list() == \
+    [[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+
 if __name__ == '__main__':
   _test() 
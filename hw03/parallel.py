@@ -0,0 +1,83 @@
+'''
+Multi-process matrix multiplication for Matrix.dot(matrix, workers=N).
+
+The rows of the left operand and the columns of the right operand are copied once, as doubles,
+to shared memory. Every worker of a process pool attaches to the shared blocks, multiplies a
+block of rows with the same kernel as the serial path (hw03._blocked_dot) and writes the block
+to a shared result. Only block indexes are sent to the workers, never the operands.
+Since every value is summed in the same order as the serial path, the results are identical to the
+serial results. Matrix.dot only calls parallel_dot for float matrixes: integer and fraction matrixes are
+multiplied serially, since doubles would change their type and precision.
+'''
+
+from array import array
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+
+from hw03 import _blocked_dot
+
+_blocks = {} # the shared blocks attached by a worker
+
+def _attach(shapes):
+  """ Attach the shared blocks in a worker.
+    :param dict shapes: name of shared block -> the number of values.
+  """
+  for name, size in shapes.items():
+    memory = SharedMemory(name=name)
+    _blocks[name] = memory, memory.buf[:size * 8].cast('d')
+
+def _multiply(rows, columns, result, inner, start, stop, column_count, block_size):
+  """ Multiply rows [start, stop) of the left operand with every column of the right operand.
+    :param str rows, columns, result: The names of shared blocks.
+    :param int inner: The length of rows and columns.
+    :param int start, stop: The range of rows.
+    :param int column_count: The number of columns.
+    :param int block_size: The size of tiles of _blocked_dot.
+  """
+  row_values = _blocks[rows][1]
+  column_values = _blocks[columns][1]
+  row_list = [row_values[index * inner:(index + 1) * inner].tolist() for index in range(start, stop)]
+  column_list = [column_values[index * inner:(index + 1) * inner].tolist() for index in range(column_count)]
+  _blocks[result][1][start * column_count:stop * column_count] = array(
+    'd', _blocked_dot(row_list, column_list, block_size)
+  )
+
+def _share(values):
+  """ Copy values to a new shared block of doubles. """
+  values = array('d', values)
+  memory = SharedMemory(create=True, size=max(len(values), 1) * 8)
+  memory.buf[:len(values) * 8] = values.tobytes()
+  return memory
+
+def parallel_dot(rows, columns, workers, block_size=64):
+  """ Multiply matrixes on a pool of processes. Return the result as a flat row-major array('d').
+    :param list rows: The rows of the left operand.
+    :param list columns: The columns of the right operand.
+    :param int workers: The number of processes.
+    :param int block_size: The size of tiles of _blocked_dot.
+  """
+  row_count, column_count = len(rows), len(columns)
+  inner = len(rows[0])
+  memories = [
+    _share(value for row in rows for value in row),
+    _share(value for column in columns for value in column),
+    SharedMemory(create=True, size=max(row_count * column_count, 1) * 8), # the result
+  ]
+  try:
+    names = [memory.name for memory in memories]
+    sizes = [row_count * inner, column_count * inner, row_count * column_count]
+    workers = min(workers, row_count)
+    boundaries = [row_count * i // workers for i in range(workers + 1)]
+    tasks = [
+      (names[0], names[1], names[2], inner, start, stop, column_count, block_size)
+        for start, stop in zip(boundaries[:-1], boundaries[1:]) if start < stop
+    ]
+    with Pool(workers, initializer=_attach, initargs=(dict(zip(names, sizes)),)) as pool:
+      pool.starmap(_multiply, tasks)
+    result = array('d')
+    result.frombytes(memories[2].buf[:sizes[2] * 8])
+  finally:
+    for memory in memories:
+      memory.close()
+      memory.unlink()
+  return result
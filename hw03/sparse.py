@@ -0,0 +1,290 @@
+'''
+Sparse matrixes sharing the operator interface of hw03.Matrix.
+
+A SparseMatrix stores its nonzero values in CSR layout: the column indexes and values of row i are
+indices[indptr[i]:indptr[i + 1]] and values[indptr[i]:indptr[i + 1]], sorted by column.
+The COO layout (parallel lists of row indexes, column indexes and values) is used for construction
+and export. Zeros are never stored, so the cost of operations between sparse matrixes is
+proportional to the number of nonzero values rather than to the shape.
+'''
+
+from functools import partial
+from itertools import repeat
+import numbers
+import operator
+
+from hw03 import Matrix, _normalize
+
+def _compress(rows):
+  """ Return the CSR lists (indptr, indices, values) of rows. Zeros are dropped.
+    :param iterable rows: One iterable of (column, value) pairs sorted by column per row.
+    Users should not call _compress.
+  """
+  indptr, indices, values = [0], [], []
+  for row in rows:
+    for column_index, value in row:
+      if value:
+        indices.append(column_index)
+        values.append(value)
+    indptr.append(len(indices))
+  return indptr, indices, values
+
+class SparseMatrix:
+  """ A matrix storing only its nonzero values in CSR layout. """
+  def __init__(self, matrix):
+    """ Initializer.
+      :param list matrix: A nested list, as accepted by Matrix.
+    """
+    matrix = Matrix(matrix)
+    self._indptr, self._indices, self._values = _compress(enumerate(row) for row in matrix._rows())
+    self._row_count, self._column_count = matrix.shape
+
+  @classmethod
+  def _from_csr(cls, indptr, indices, values, shape):
+    """ Create a sparse matrix from CSR lists without validation. Users should not call _from_csr. """
+    matrix = cls.__new__(cls)
+    matrix._indptr, matrix._indices, matrix._values = indptr, indices, values
+    matrix._row_count, matrix._column_count = shape
+    return matrix
+
+  @classmethod
+  def _from_rows(cls, rows, shape):
+    """ Create a sparse matrix from one dict {column: value} per row. Zeros are dropped.
+      Users should not call _from_rows.
+    """
+    return cls._from_csr(*_compress(sorted(row.items()) for row in rows), shape)
+
+  @classmethod
+  def from_coo(cls, row_indices, column_indices, values, shape):
+    """ Create a sparse matrix from the COO layout. Values at the same position are summed.
+      :param list row_indices
+      :param list column_indices
+      :param list values
+      :param tuple shape: (row, column).
+    """
+    assert len(row_indices) == len(column_indices) == len(values), 'COO lists must be of the same length.'
+    rows = [{} for i in range(shape[0])]
+    for row_index, column_index, value in zip(row_indices, column_indices, values):
+      assert 0 <= row_index < shape[0] and 0 <= column_index < shape[1], 'Index out of range.'
+      assert isinstance(value, numbers.Real), 'Matrix only accepts integer, float or fraction values.'
+      rows[row_index][column_index] = rows[row_index].get(column_index, 0) + value
+    return cls._from_rows(rows, shape)
+
+  @classmethod
+  def from_matrix(cls, matrix):
+    """ Create a sparse matrix from the nonzero values of a Matrix.
+      :param Matrix matrix
+    """
+    return cls._from_csr(*_compress(enumerate(row) for row in matrix._rows()), matrix.shape)
+
+  def coo(self):
+    """ Return the COO layout, (row indexes, column indexes, values). """
+    row_indices = [
+      row_index for row_index in range(self._row_count)
+        for k in range(self._indptr[row_index], self._indptr[row_index + 1])
+    ]
+    return row_indices, list(self._indices), list(self._values)
+
+  def to_matrix(self, storage='list'):
+    """ Convert the matrix to a dense Matrix.
+      :param str storage: The storage of Matrix.
+    """
+    data = [0] * (self._row_count * self._column_count)
+    for row_index in range(self._row_count):
+      for column_index, value in self._row_items(row_index):
+        data[row_index * self._column_count + column_index] = value
+    matrix = Matrix._from_buffer(data, self.shape)
+    return matrix if storage == 'list' else matrix._new(data, self.shape)
+
+  @property
+  def shape(self):
+    """ Return the shape of matrix in the form of (row, column). """
+    return self._row_count, self._column_count
+
+  @property
+  def nnz(self):
+    """ Return the number of stored (nonzero) values. """
+    return len(self._values)
+
+  def _row_items(self, index):
+    """ Return the (column, value) pairs of a row. Users should not call _row_items. """
+    start, stop = self._indptr[index], self._indptr[index + 1]
+    return zip(self._indices[start:stop], self._values[start:stop])
+
+  def __str__(self):
+    """ Convert SparseMatrix instance to string in the format of Matrix. """
+    return str(self.to_matrix())
+
+  def to_list(self):
+    """ Convert the matrix to a (nested) list. """
+    return self.to_matrix().to_list()
+
+  def __add__(self, matrix):
+    """ Override + operator. A sparse operand gives a sparse result, a dense operand a dense result. """
+    return self._merge(matrix, operator.add)
+
+  def __sub__(self, matrix):
+    """ Override - operator. A sparse operand gives a sparse result, a dense operand a dense result. """
+    return self._merge(matrix, operator.sub)
+
+  def __mul__(self, matrix):
+    """ Override * operator. The result is sparse. """
+    return self._scale(matrix, operator.mul)
+
+  def __truediv__(self, matrix):
+    """ Override / operator. The result is sparse; only the nonzero values of self are divided. """
+    return self._scale(matrix, operator.truediv)
+
+  def __radd__(self, matrix):
+    return self._merge(matrix, operator.add, reflected=True)
+
+  def __rsub__(self, matrix):
+    return self._merge(matrix, operator.sub, reflected=True)
+
+  def __rmul__(self, matrix):
+    return self._scale(matrix, operator.mul, reflected=True)
+
+  def __rtruediv__(self, matrix):
+    """ The zeros of self become divisors, so the result is dense. """
+    return matrix / self.to_matrix()
+
+  def _merge(self, matrix, operator, reflected=False):
+    """ Implementation of + and -. Users should not call _merge. """
+    if not isinstance(matrix, SparseMatrix):
+      # the zeros of self become values, so the result is dense
+      dense = self.to_matrix()
+      return operator(matrix, dense) if reflected else operator(dense, matrix)
+    assert self.shape == matrix.shape, 'Incompatible shapes.'
+    left, right = (matrix, self) if reflected else (self, matrix)
+    rows = []
+    for row_index in range(self._row_count):
+      row = {column_index: operator(value, 0) for column_index, value in left._row_items(row_index)}
+      for column_index, value in right._row_items(row_index):
+        row[column_index] = operator(row.get(column_index, 0), value)
+      rows.append(row)
+    return SparseMatrix._from_rows(rows, self.shape)
+
+  def _scale(self, matrix, operator, reflected=False):
+    """ Implementation of * and /, which only visit the nonzero values of self. Users should not call _scale. """
+    if isinstance(matrix, numbers.Real):
+      other = repeat(matrix)
+    else:
+      assert isinstance(matrix, (Matrix, SparseMatrix)), 'Operands must be matrixes or scalars.'
+      assert self.shape == matrix.shape, 'Incompatible shapes.'
+      other = (
+        matrix[row_index, column_index]
+          for row_index in range(self._row_count) for column_index, value in self._row_items(row_index)
+      )
+    values = list(map(operator, other, self._values) if reflected else map(operator, self._values, other))
+    rows = (
+      zip(self._indices[start:stop], values[start:stop])
+        for start, stop in zip(self._indptr, self._indptr[1:])
+    )
+    return SparseMatrix._from_csr(*_compress(rows), self.shape)
+
+  def __getitem__(self, index):
+    """ Return element matrix[i, j] by binary search in row i. Negative indexes count from the end. """
+    from bisect import bisect_left
+    row_index, column_index = index
+    row_index = _normalize(row_index, self._row_count, 'Row')
+    column_index = _normalize(column_index, self._column_count, 'Column')
+    start, stop = self._indptr[row_index], self._indptr[row_index + 1]
+    k = bisect_left(self._indices, column_index, start, stop)
+    return self._values[k] if k < stop and self._indices[k] == column_index else 0
+
+  def dot(self, matrix):
+    """ Compute the dot product of matrixes in time proportional to the number of multiplied nonzero values.
+      A sparse operand gives a sparse result, a dense operand a dense Matrix.
+      :param SparseMatrix / Matrix matrix
+    """
+    assert isinstance(matrix, (Matrix, SparseMatrix)), 'Operands must be matrixes.'
+    assert self._column_count == matrix.shape[0], 'The shapes of operands are not compatible.'
+    shape = self._row_count, matrix.shape[1]
+    if isinstance(matrix, SparseMatrix):
+      # Gustavson's algorithm: row i of the result combines the rows of matrix selected by row i of self
+      rows = []
+      for row_index in range(self._row_count):
+        row = {}
+        for k, value in self._row_items(row_index):
+          for column_index, other in matrix._row_items(k):
+            row[column_index] = row.get(column_index, 0) + value * other
+        rows.append(row)
+      return SparseMatrix._from_rows(rows, shape)
+
+    data = []
+    for row_index in range(self._row_count):
+      row = [0] * shape[1]
+      for k, value in self._row_items(row_index):
+        row = list(map(operator.add, row, map(partial(operator.mul, value), matrix._row(k))))
+      data.extend(row)
+    return Matrix._from_buffer(data, shape)
+
+  def _rdot(self, matrix):
+    """ Compute matrix.dot(self) for a dense Matrix. The result is a dense Matrix of the storage of matrix.
+      Row i of the result combines the rows of self selected by the nonzero values of row i of matrix.
+      Called by Matrix.dot. Users should not call _rdot.
+    """
+    assert matrix.shape[1] == self._row_count, 'The shapes of operands are not compatible.'
+    shape = matrix.shape[0], self._column_count
+    data = []
+    for row in matrix._rows():
+      result = [0] * shape[1]
+      for k, value in enumerate(row):
+        if value:
+          for column_index, other in self._row_items(k):
+            result[column_index] += value * other
+      data.extend(result)
+    return matrix._new(data, shape)
+
+  def transpose(self):
+    """ Return a transposed sparse matrix, in O(nnz + n) by counting sort. """
+    counts = [0] * (self._column_count + 1)
+    for column_index in self._indices:
+      counts[column_index + 1] += 1
+    for index in range(self._column_count):
+      counts[index + 1] += counts[index]
+    indptr = list(counts)
+    indices, values = [0] * self.nnz, [0] * self.nnz
+    for row_index in range(self._row_count):
+      for column_index, value in self._row_items(row_index):
+        position = counts[column_index]
+        indices[position], values[position] = row_index, value
+        counts[column_index] += 1
+    return SparseMatrix._from_csr(indptr, indices, values, (self._column_count, self._row_count))
+
+def _test():
+  """
+    Unit test.
+    Users should not call _test.
+  """
+  import numpy as np
+  from hw03 import _test_equal
+
+  shape = (32, 48)
+  arrays = [np.random.random(shape) * (np.random.random(shape) < 0.05) for i in range(2)]
+  sparse = [SparseMatrix(array.tolist()) for array in arrays]
+  dense = [Matrix(array.tolist()) for array in arrays]
+  print('Test conversion', _test_equal(arrays[0], sparse[0]), _test_equal(arrays[0], SparseMatrix.from_matrix(dense[0])))
+  print('Test COO', _test_equal(arrays[0], SparseMatrix.from_coo(*sparse[0].coo(), shape)))
+  print('Test + operation', _test_equal(arrays[0] + arrays[1], sparse[0] + sparse[1]),
+    _test_equal(arrays[0] + arrays[1], sparse[0] + dense[1]), _test_equal(arrays[0] + arrays[1], dense[0] + sparse[1]))
+  print('Test - operation', _test_equal(arrays[0] - arrays[1], sparse[0] - sparse[1]),
+    _test_equal(arrays[0] - arrays[1], dense[0] - sparse[1]))
+  print('Test * operation', _test_equal(arrays[0] * arrays[1], sparse[0] * sparse[1]),
+    _test_equal(arrays[0] * 3, 3 * sparse[0]))
+  print('Test / operation', _test_equal(arrays[0] / 2, sparse[0] / 2),
+    _test_equal(arrays[0] / (arrays[1] + 1), sparse[0] / (dense[1] + 1)))
+  print('Test transpose', _test_equal(arrays[0].T, sparse[0].transpose()))
+  print('Test dot product', _test_equal(np.dot(arrays[0], arrays[1].T), sparse[0].dot(sparse[1].transpose())),
+    _test_equal(np.dot(arrays[0], arrays[1].T), sparse[0].dot(dense[1].transpose())),
+    _test_equal(np.dot(arrays[0], arrays[1].T), dense[0].dot(sparse[1].transpose())))
+  divisor = SparseMatrix((arrays[0] + 1).tolist()) # no zeros to divide by
+  print('Test reflected / operation', _test_equal(arrays[1] / (arrays[0] + 1), dense[1] / divisor),
+    _test_equal(2 / (arrays[0] + 1), 2 / divisor))
+  print('Test negative index', sparse[0][-1, -2] == arrays[0][-1, -2], sparse[0][-32, 0] == arrays[0][0, 0])
+  square = (arrays[0][:, :32] + 2 * np.eye(32)).tolist() # diagonally dominant, so nonsingular
+  print('Test solve', _test_equal(np.linalg.solve(square, arrays[1][:, :32]), Matrix(square).solve(SparseMatrix(arrays[1][:, :32].tolist()))),
+    _test_equal(np.eye(2), Matrix([[2., 0], [0, 4.]]).solve(SparseMatrix([[2., 0], [0, 4.]]))))
+
+if __name__ == '__main__':
+  _test()